@@ -13,24 +13,72 @@
 # limitations under the License.
 
 import os
+import sys
+import logging
+import importlib
 
 from pyhdb.exceptions import *
-from pyhdb.connection import Connection
-from pyhdb.protocol.lobs import Blob, Clob, NClob
-from pyhdb.compat import configparser
+
+# Leave logging configuration to the application, see "Configuring Logging for a Library" in the logging docs
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 apilevel = "2.0"
 threadsafety = 2
 paramstyle = "numeric"
 tracing = os.environ.get('HDB_TRACE', 'FALSE').upper() in ('TRUE', '1')
 
-
-def connect(host, port, user, password, autocommit=False):
-    conn = Connection(host, port, user, password, autocommit)
+# Classes which are only imported on first use, mapped to the module defining them
+_LAZY = {
+    'Connection': 'pyhdb.connection',
+    'Blob': 'pyhdb.protocol.lobs',
+    'Clob': 'pyhdb.protocol.lobs',
+    'NClob': 'pyhdb.protocol.lobs',
+    'AsyncConnection': 'pyhdb.aconnection',
+    'ConnectionPool': 'pyhdb.pool',
+}
+
+__all__ = [
+    'apilevel', 'threadsafety', 'paramstyle', 'connect',
+    'Error', 'Warning', 'InterfaceError', 'DatabaseError', 'InternalError', 'OperationalError',
+    'ConnectionTimedOutError', 'ProgrammingError', 'IntegrityError', 'DataError', 'NotSupportedError',
+] + list(_LAZY)
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # Import the protocol stack only when one of its classes is actually used (PEP 562)
+        if name not in _LAZY:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        # Classes imported already are in globals() as well
+        return sorted(set(globals()).union(_LAZY))
+else:
+    from pyhdb.connection import Connection
+    from pyhdb.protocol.lobs import Blob, Clob, NClob
+    from pyhdb.pool import ConnectionPool
+    # AsyncConnection requires Python 3.7
+    __all__.remove('AsyncConnection')
+
+
+def connect(host, port, user, password, autocommit=False, ssl_context=None):
+    from pyhdb.connection import Connection
+    conn = Connection(host, port, user, password, autocommit, ssl_context=ssl_context)
     conn.connect()
     return conn
 
 
+def from_pool(minconn, maxconn, host, port, user, password, autocommit=False, idle_timeout=300, ssl_context=None):
+    """
+    Create a pool of connections, see pyhdb.pool.ConnectionPool
+    Borrow connections from the returned pool with its connection() context manager or getconn()/putconn().
+    """
+    from pyhdb.pool import ConnectionPool
+    return ConnectionPool(minconn, maxconn, host, port, user, password, autocommit, idle_timeout, ssl_context)
+
+
 def from_ini(ini_file, section=None):
     """
     Make connection to database by reading connection parameters from an ini file.
@@ -50,6 +98,7 @@ def from_ini(ini_file, section=None):
     """
     if not os.path.exists(ini_file):
         raise RuntimeError('Could not find ini file %s' % ini_file)
+    import configparser
     cp = configparser.ConfigParser()
     cp.read(ini_file)
     if not cp.sections():
@@ -77,17 +126,20 @@ def from_ini(ini_file, section=None):
     # Remove the 'hana_' prefix so that parameter names match the arguments of the pyhdb.connect() function.
     # Also remove invalid keys from clean_params (like 'hostname' etc).
 
-    def rm_prefix(param):
-        return param[5:] if param.startswith('hana_') else param
-
-    valid_keys = ('host', 'port', 'user', 'password')
-    clean_params = {'%s' % rm_prefix(key): val for key, val in params.items() if rm_prefix(key) in valid_keys}
+    valid_keys = {'host', 'port', 'user', 'password'}
+    clean_params = {}
+    for key, val in params.items():
+        if key.startswith('hana_'):
+            key = key[5:]
+        if key in valid_keys:
+            clean_params[key] = val
 
     # make actual connection:
     return connect(**clean_params)
 
 
-# Add from_ini() as attribute to the connect method, so to use it do: pyhdb.connect.from_ini(ini_file)
+# Add from_ini() and from_pool() as attributes to the connect method, so to use it do: pyhdb.connect.from_ini(ini_file)
 connect.from_ini = from_ini
+connect.from_pool = from_pool
 # ... and cleanup the local namespace:
-del from_ini
+del from_ini, from_pool
@@ -0,0 +1,176 @@
+# Copyright 2014, 2015 SAP SE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Requires Python 3.7+, this module is only imported on demand (see pyhdb.__getattr__)
+
+import socket
+import asyncio
+import logging
+###
+from pyhdb.connection import BaseConnection, INITIALIZATION_BYTES, pack_control_request
+from pyhdb.exceptions import Error, OperationalError, ConnectionTimedOutError
+from pyhdb.protocol.message import ReplyMessage
+from pyhdb.protocol.constants import message_types
+
+logger = logging.getLogger('pyhdb')
+debug = logger.debug
+
+
+class AsyncConnection(BaseConnection):
+    """
+    Database connection class for asyncio applications
+
+    Works like pyhdb.Connection, but all methods talking to the database are coroutines.
+    The socket is driven by the running event loop, so a single thread can serve many connections.
+    """
+    __slots__ = ('_socket_lock',)
+
+    def __init__(self, host, port, user, password, autocommit=False, timeout=None, socket_options=None):
+        super(AsyncConnection, self).__init__(host, port, user, password, autocommit, timeout, socket_options)
+        # Created on connect, so that the lock belongs to the event loop actually using the connection
+        self._socket_lock = None
+
+    def __repr__(self):
+        return '<Hana async connection host=%s port=%s user=%s>' % (self.host, self.port, self.user)
+
+    async def _open_socket_and_init_protocoll(self):
+        loop = asyncio.get_running_loop()
+        addresses = await loop.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)
+
+        error = None
+        for family, type_, proto, _, address in addresses:
+            sock = socket.socket(family, type_, proto)
+            sock.setblocking(False)
+            try:
+                # Set before connecting, see Connection._create_socket()
+                self._apply_socket_options(sock)
+                await loop.sock_connect(sock, address)
+            except OSError as exc:
+                sock.close()
+                error = exc
+                continue
+            self._socket = sock
+            break
+        else:
+            raise error or OSError("getaddrinfo returns an empty list")
+
+        # Initialization Handshake
+        await loop.sock_sendall(self._socket, INITIALIZATION_BYTES)
+
+        self._process_init_reply(await self._recv_exact(8))
+
+    async def send_request(self, message):
+        """Send message request to HANA db and return reply message
+        :param message: Instance of Message object containing segments and parts of a HANA db request
+        :returns: Instance of reply Message object
+        """
+        self._check_closed()
+        payload = message.pack()  # obtain BytesIO instance, its buffer is sent without a copy
+        async with self._socket_lock:
+            return await self.__send_message_recv_reply(payload.getbuffer())
+
+    async def _send_request(self, message):
+        """Same as send_request() but for callers which already hold the socket lock"""
+        payload = message.pack()
+        return await self.__send_message_recv_reply(payload.getbuffer())
+
+    async def __send_message_recv_reply(self, packed_message):
+        """
+        Private method to send packed message and receive the reply message.
+        :param packed_message: a bytes-like object containing the entire message payload
+        """
+        try:
+            if self._timeout is None:
+                header, payload = await self.__exchange(packed_message)
+            else:
+                header, payload = await asyncio.wait_for(self.__exchange(packed_message), self._timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionTimedOutError()
+        except (IOError, OSError) as error:
+            raise OperationalError("Lost connection to HANA server (%r)" % error)
+
+        return ReplyMessage.unpack_reply(header, memoryview(payload))
+
+    async def __exchange(self, packed_message):
+        await asyncio.get_running_loop().sock_sendall(self._socket, packed_message)
+
+        # Read first message header
+        raw_header = await self._recv_exact(ReplyMessage.header_size)
+        header = self._process_reply_header(raw_header)
+
+        payload = await self._recv_exact(header.payload_length)
+        if logger.isEnabledFor(logging.DEBUG):
+            debug('Read %d bytes payload from socket', len(payload))
+        return header, payload
+
+    async def _recv_exact(self, size):
+        """Receive size bytes from the socket
+        :returns: bytearray, only shorter than size if the connection was closed by the server
+        """
+        loop = asyncio.get_running_loop()
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            _received = await loop.sock_recv_into(self._socket, view[received:])
+            if not _received:
+                return buffer[:received]
+            received += _received
+        return buffer
+
+    async def connect(self):
+        if self._socket_lock is None:
+            self._socket_lock = asyncio.Lock()
+
+        async with self._socket_lock:
+            if self._socket is not None:
+                # Socket already established
+                return
+
+            await self._open_socket_and_init_protocoll()
+
+            # Perform the authenication handshake and get the part
+            # with the agreed authentication data
+            response = await self._send_request(self._auth_manager.get_initial_request())
+            agreed_auth_part = self._auth_manager.process_initial_reply(response)
+            await self._send_request(self._connect_request(agreed_auth_part))
+
+    async def close(self):
+        if self._socket is None:
+            raise Error("Connection already closed")
+
+        async with self._socket_lock:
+            if self._socket is None:
+                raise Error("Connection already closed")
+
+            try:
+                reply = await self.__send_message_recv_reply(pack_control_request(self, message_types.DISCONNECT))
+                self._check_disconnect_reply(reply)
+            finally:
+                self._socket.close()
+                self._socket = None
+
+    async def commit(self):
+        self._check_closed()
+
+        packed = pack_control_request(self, message_types.COMMIT)
+        async with self._socket_lock:
+            await self.__send_message_recv_reply(packed)
+
+    async def rollback(self):
+        self._check_closed()
+
+        packed = pack_control_request(self, message_types.ROLLBACK)
+        async with self._socket_lock:
+            await self.__send_message_recv_reply(packed)
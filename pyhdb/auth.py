@@ -13,20 +13,34 @@
 # limitations under the License.
 
 import os
-import struct
 import hashlib
 import hmac
-from io import BytesIO
 ###
 from pyhdb.protocol.segments import RequestSegment
 from pyhdb.protocol.constants import message_types
 from pyhdb.protocol.parts import Authentication, Fields
 from pyhdb.protocol.message import RequestMessage
-from pyhdb.compat import iter_range
 
 CLIENT_PROOF_SIZE = 32
 CLIENT_KEY_SIZE = 64
 
+if hasattr(hmac, 'digest'):
+    # Python 3.7+: one-shot HMAC computed entirely within OpenSSL
+    def hmac_sha256(key, msg):
+        return hmac.digest(key, msg, 'sha256')
+else:
+    def hmac_sha256(key, msg):
+        return hmac.new(key, msg, hashlib.sha256).digest()
+
+# Pristine SHA-256 state, copying it is cheaper than setting up a new hash object
+_sha256 = hashlib.sha256()
+
+
+def sha256(data):
+    ctx = _sha256.copy()
+    ctx.update(data)
+    return ctx.digest()
+
 
 class AuthManager(object):
 
@@ -34,21 +48,34 @@ class AuthManager(object):
         self.connection = connection
         self.user = user
         self.password = password
+        self._password_bytes = None
+        # Keys derived from the password per salt, kept with this connection only so that they go away with it
+        self._derived_keys = {}
 
         self.method = b"SCRAMSHA256"
-        self.client_key = os.urandom(CLIENT_KEY_SIZE)
+        self.client_key = None
         self.client_proof = None
 
     def perform_handshake(self):
-        request = RequestMessage.new(
+        # Called by Connection.connect() which already holds the socket lock
+        response = self.connection._send_request(self.get_initial_request())
+        return self.process_initial_reply(response)
+
+    def get_initial_request(self):
+        """Return the AUTHENTICATE request message starting the handshake"""
+        # The client key is a nonce: it is only generated when a handshake
+        # actually happens and never reused for a second one.
+        self.client_key = os.urandom(CLIENT_KEY_SIZE)
+        return RequestMessage.new(
             self.connection,
             RequestSegment(
                 message_types.AUTHENTICATE,
                 Authentication(self.user, {self.method: self.client_key})
             )
         )
-        response = self.connection.send_request(request)
 
+    def process_initial_reply(self, response):
+        """Return the authentication part for the CONNECT request from the server's reply"""
         auth_part = response.segments[0].parts[0]
         if self.method not in auth_part.methods:
             raise Exception(
@@ -56,44 +83,46 @@ class AuthManager(object):
                 b",".join(auth_part.methods.keys())
             )
 
-        salt, server_key = Fields.unpack_data(
-            BytesIO(auth_part.methods[self.method])
-        )
+        salt, server_key = Fields.unpack_from(auth_part.methods[self.method])
 
         self.client_proof = self.calculate_client_proof([salt], server_key)
         return Authentication(self.user, {'SCRAMSHA256': self.client_proof})
 
     def calculate_client_proof(self, salts, server_key):
-        proof = b"\x00"
-        proof += struct.pack('b', len(salts))
+        proof = bytearray(b"\x00")
+        proof.append(len(salts))
 
         for salt in salts:
-            proof += struct.pack('b', CLIENT_PROOF_SIZE)
+            proof.append(CLIENT_PROOF_SIZE)
             proof += self.scramble_salt(salt, server_key)
 
-        return proof
+        return bytes(proof)
 
     def scramble_salt(self, salt, server_key):
         msg = salt + server_key + self.client_key
 
-        key = hashlib.sha256(
-            hmac.new(
-                self.password.encode('cesu-8'), salt, hashlib.sha256
-            ).digest()
-        ).digest()
-        key_hash = hashlib.sha256(key).digest()
+        if self._password_bytes is None:
+            # The password doesn't change, so it only needs to be encoded once
+            self._password_bytes = self.password.encode('cesu-8')
+        try:
+            key, key_hash = self._derived_keys[salt]
+        except KeyError:
+            key, key_hash = self._derived_keys[salt] = self._derive_keys(self._password_bytes, salt)
 
-        sig = hmac.new(
-            key_hash, msg, hashlib.sha256
-        ).digest()
+        sig = hmac_sha256(key_hash, msg)
 
         return self._xor(sig, key)
 
+    @staticmethod
+    def _derive_keys(password, salt):
+        """Derive key and key hash from password and salt.
+        Both only depend on the arguments, so reconnects of the same connection can reuse them.
+        """
+        key = sha256(hmac_sha256(password, salt))
+        key_hash = sha256(key)
+        return key, key_hash
+
     @staticmethod
     def _xor(a, b):
-        a = bytearray(a)
-        b = bytearray(b)
-        result = bytearray(len(a))
-        for i in iter_range(len(a)):
-            result[i] += a[i] ^ b[i]
-        return bytes(result)
+        # XOR both byte strings as big integers in one go instead of byte by byte
+        return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
@@ -12,124 +12,142 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
 import codecs
-from pyhdb.compat import PY2, unichr
+import struct
 
 SURROGATE_IDENTICATOR_INT = 0xED
 SURROGATE_IDENTICATOR_BYTE = b'\xed'
 
+# A CESU-8 surrogate pair is 0xED 0xA0-0xBF 0x80-0xBF 0xED 0xB0-0xBF 0x80-0xBF.
+# Read as one 48 bit big endian integer, all six byte ranges can be checked at once
+# by masking out the variable low bits of each byte and comparing with the fixed high bits.
+SURROGATE_PAIR_MASK = 0xFFE0C0FFF0C0
+SURROGATE_PAIR_PATTERN = 0xEDA080EDB080
+surrogate_pair_struct = struct.Struct('>HI')
+
+# Characters outside of the BMP which have to be encoded as surrogate pairs
+SUPPLEMENTARY_CHARS = re.compile(u'[\U00010000-\U0010FFFF]')
+
 
 class IncrementalDecoder(codecs.BufferedIncrementalDecoder):
     # Decoder inspired by python-ftfy written by Rob Speer
     # https://github.com/LuminosoInsight/python-ftfy/blob/master/ftfy/bad_codecs/utf8_variants.py
 
     def _buffer_decode(self, input, errors, final):
-        decoded_segments = []
-        position = 0
+        return _buffer_decode(input, errors, final)
+
+    def _buffer_decode_step(self, input, errors, final):
+        return _buffer_decode_step(input, errors, final)
+
 
-        while True:
-            decoded, consumed = self._buffer_decode_step(input[position:], errors, final)
+class IncrementalEncoder(codecs.BufferedIncrementalEncoder):
 
-            if consumed == 0:
-                break
+    def _buffer_encode(self, input, errors, final=False):
+        return _buffer_encode(input, errors)
 
-            decoded_segments.append(decoded)
-            position += consumed
+    def _buffer_encode_step(self, char, errors, final):
+        return _buffer_encode_step(char, errors)
+
+
+# The codec itself is stateless, the incremental classes above only add the
+# buffering of incomplete input. One-shot encode() and decode() call these
+# functions directly instead of creating codec objects for every value.
+
+def _buffer_decode(input, errors, final):
+    decoded_segments = []
+    position = 0
+    input_length = len(input)
+
+    while position < input_length:
+        # Everything up to the next possible surrogate is plain UTF-8 and
+        # can be decoded in one go, without slicing off the remaining input.
+        cesu8_surrogate_start = input.find(SURROGATE_IDENTICATOR_BYTE, position)
+        if cesu8_surrogate_start == -1:
+            decoded, consumed = codecs.utf_8_decode(input[position:], errors, final)
+        elif cesu8_surrogate_start > position:
+            decoded, consumed = codecs.utf_8_decode(input[position:cesu8_surrogate_start], errors, final)
+        else:
+            decoded, consumed = _buffer_decode_step(input[position:position + 6], errors, final)
 
-        if final and position != len(input):
-            raise Exception("Final decoder doesn't decoded all bytes")
+        if consumed == 0:
+            break
 
-        return u''.join(decoded_segments), position
+        decoded_segments.append(decoded)
+        position += consumed
 
-    def _buffer_decode_step(self, input, errors, final):
-        # If begin of CESU-8 sequence
-        if input.startswith(SURROGATE_IDENTICATOR_BYTE):
-            if len(input) < 6:
-                if not final:
-                    # Stream is not done yet
-                    return u'', 0
-
-                # As there are less than six bytes it can't be a CESU-8 surrogate
-                # but probably a UTF-8 byte sequence
-                return codecs.utf_8_decode(input, errors, final)
-
-            if PY2:
-                bytenums = [ord(b) for b in input[:6]]
-            else:
-                bytenums = input
-
-            # Verify that the 6 bytes are in possible range of a CESU-8 surrogate
-            if bytenums[1] >= 0xa0 and bytenums[1] <= 0xbf and \
-               bytenums[2] >= 0x80 and bytenums[2] <= 0xbf and \
-               bytenums[3] == SURROGATE_IDENTICATOR_INT and \
-               bytenums[4] >= 0xb0 and bytenums[4] <= 0xbf and \
-               bytenums[5] >= 0x80 and bytenums[5] <= 0xbf:
-
-                codepoint = (
-                    ((bytenums[1] & 0x0f) << 16) +
-                    ((bytenums[2] & 0x3f) << 10) +
-                    ((bytenums[4] & 0x0f) << 6) +
-                    (bytenums[5] & 0x3f) +
-                    0x10000
-                )
-                return unichr(codepoint), 6
-
-            # No CESU-8 surrogate but probably a 3 byte UTF-8 sequence
-            return codecs.utf_8_decode(input[:3], errors, final)
-
-        cesu8_surrogate_start = input.find(SURROGATE_IDENTICATOR_BYTE)
-        if cesu8_surrogate_start > 0:
-            # Decode everything until start of cesu8 surrogate pair
-            return codecs.utf_8_decode(input[:cesu8_surrogate_start], errors, final)
-
-        # No sign of CESU-8 encoding
+    if final and position != len(input):
+        raise Exception("Final decoder doesn't decoded all bytes")
+
+    return u''.join(decoded_segments), position
+
+
+def _buffer_decode_step(input, errors, final):
+    # Only called with input starting with SURROGATE_IDENTICATOR_BYTE, runs
+    # of plain UTF-8 are handled by _buffer_decode() itself.
+    if len(input) < 6:
+        if not final:
+            # Stream is not done yet
+            return u'', 0
+
+        # As there are less than six bytes it can't be a CESU-8 surrogate
+        # but probably a UTF-8 byte sequence
         return codecs.utf_8_decode(input, errors, final)
 
+    high, low = surrogate_pair_struct.unpack_from(input)
+    sequence = (high << 32) | low
 
-class IncrementalEncoder(codecs.BufferedIncrementalEncoder):
+    # Verify that the 6 bytes are in possible range of a CESU-8 surrogate
+    if sequence & SURROGATE_PAIR_MASK == SURROGATE_PAIR_PATTERN:
+        codepoint = (
+            ((sequence >> 16) & 0xf0000) +  # bytes[1] & 0x0f
+            ((sequence >> 14) & 0xfc00) +   # bytes[2] & 0x3f
+            ((sequence >> 2) & 0x3c0) +     # bytes[4] & 0x0f
+            (sequence & 0x3f) +             # bytes[5] & 0x3f
+            0x10000
+        )
+        return chr(codepoint), 6
 
-    def _buffer_encode(self, input, errors, final=False):
-        encoded_segments = []
-        position = 0
-        input_length = len(input)
+    # No CESU-8 surrogate but probably a 3 byte UTF-8 sequence
+    return codecs.utf_8_decode(input[:3], errors, final)
 
-        while position + 1 <= input_length:
-            encoded, consumed = self._buffer_encode_step(
-                input[position], errors, final
-            )
 
-            if consumed == 0:
-                break
+def _buffer_encode(input, errors):
+    encoded_segments = []
+    position = 0
 
-            encoded_segments.append(encoded)
-            position += consumed
+    # Only characters outside of the BMP differ from UTF-8, everything
+    # between them is encoded by the UTF-8 codec in a single call.
+    for match in SUPPLEMENTARY_CHARS.finditer(input):
+        if match.start() > position:
+            encoded_segments.append(codecs.utf_8_encode(input[position:match.start()], errors)[0])
+        encoded_segments.append(_buffer_encode_step(match.group(), errors)[0])
+        position = match.end()
 
-        if final and position != len(input):
-            raise Exception("Final encoder doesn't encode all characters")
+    if position < len(input):
+        encoded_segments.append(codecs.utf_8_encode(input[position:], errors)[0])
 
-        return b''.join(encoded_segments), position
+    return b''.join(encoded_segments), len(input)
 
-    def _buffer_encode_step(self, char, errors, final):
-        codepoint = ord(char)
-        if codepoint <= 65535:
-            return codecs.utf_8_encode(char, errors)
-        else:
-            seq = bytearray(6)
-            seq[0] = 0xED
-            seq[1] = 0xA0 | (((codepoint & 0x1F0000) >> 16) - 1)
-            seq[2] = 0x80 | (codepoint & 0xFC00) >> 10
-            seq[3] = 0xED
-            seq[4] = 0xB0 | ((codepoint >> 6) & 0x3F)
-            seq[5] = 0x80 | (codepoint & 0x3F)
-            return bytes(seq), 1
+
+def _buffer_encode_step(char, errors):
+    codepoint = ord(char)
+    if codepoint <= 65535:
+        return codecs.utf_8_encode(char, errors)
+    else:
+        # Fill the codepoint bits into the free bits of SURROGATE_PAIR_PATTERN
+        return surrogate_pair_struct.pack(
+            0xEDA0 | (((codepoint >> 16) & 0x1F) - 1),
+            0x80EDB080 | ((codepoint >> 10) & 0x3F) << 24 | ((codepoint >> 6) & 0x0F) << 8 | (codepoint & 0x3F)
+        ), 1
 
 
 def encode(input, errors='strict'):
-    return IncrementalEncoder(errors).encode(input, final=True), len(input)
+    return _buffer_encode(input, errors)
 
 
 def decode(input, errors='strict'):
-    return IncrementalDecoder(errors).decode(input, final=True), len(input)
+    return _buffer_decode(bytes(input), errors, True)[0], len(input)
 
 
 class StreamWriter(codecs.StreamWriter):
@@ -152,7 +170,8 @@ CESU8_CODEC_INFO = codecs.CodecInfo(
 
 
 def search_function(encoding):
-    if encoding == 'cesu-8':
+    # Python 3.9+ normalizes the name to 'cesu_8' before asking search functions
+    if encoding in ('cesu-8', 'cesu_8'):
         return CESU8_CODEC_INFO
     else:
         return None
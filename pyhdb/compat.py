@@ -12,51 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import sys
+# Python 2 and 'narrow' unicode builds are not supported anymore. The aliases below
+# remain for code importing them from here, pyhdb itself uses the builtins directly.
 
-PY2 = sys.version_info[0] == 2
-PY26 = PY2 and sys.version_info[1] == 6
-PY3 = sys.version_info[0] == 3
-
-if PY2:
-    text_type = unicode
-    byte_type = bytearray
-    string_types = (str, unicode)
-    int_types = (int, long)
-    unichr = unichr
-    iter_range = xrange
-    import ConfigParser as configparser
-    from itertools import izip
-else:
-    text_type = str
-    byte_type = bytes
-    string_types = (str,)
-    int_types = (int,)
-    unichr = chr
-    iter_range = range
-    import configparser
-    izip = zip
-
-# workaround for 'narrow' Python builds
-if sys.maxunicode <= 65535:
-    unichr = lambda n: ('\\U%08x' % n).decode('unicode-escape')
-
-
-def with_metaclass(meta, *bases):
-    """
-    Function from jinja2/_compat.py.
-    Author: Armin Ronacher
-    License: BSD.
-    """
-    class metaclass(meta):
-        __call__ = type.__call__
-        __init__ = type.__init__
-        def __new__(cls, name, this_bases, d):
-            if this_bases is None:
-                return type.__new__(cls, name, (), d)
-            return meta(name, bases, d)
-    return metaclass('temporary_class', None, {})
+text_type = str
+byte_type = bytes
+string_types = (str,)
+int_types = (int,)
+unichr = chr
+iter_range = range
+izip = zip
 
 
 def is_text(obj):
-    return isinstance(obj, text_type)
+    return isinstance(obj, str)
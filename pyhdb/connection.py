@@ -12,35 +12,94 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import io
 import os
+import itertools
 import socket
 import struct
 import threading
 import logging
 ###
+import pyhdb
 from pyhdb.auth import AuthManager
 from pyhdb.cursor import Cursor
 from pyhdb.exceptions import Error, OperationalError, ConnectionTimedOutError
 from pyhdb.protocol.segments import RequestSegment
 from pyhdb.protocol.message import RequestMessage, ReplyMessage
 from pyhdb.protocol.parts import ClientId, ConnectOptions
-from pyhdb.protocol.constants import message_types, function_codes, DEFAULT_CONNECTION_OPTIONS
+from pyhdb.protocol.constants import message_types, function_codes, DEFAULT_CONNECTION_OPTIONS, MAX_MESSAGE_SIZE
 
-INITIALIZATION_BYTES = bytearray([
-    255, 255, 255, 255, 4, 20, 0, 4, 1, 0, 0, 1, 1, 1
-])
+INITIALIZATION_BYTES = b"\xff\xff\xff\xff\x04\x14\x00\x04\x01\x00\x00\x01\x01\x01"
 
 logger = logging.getLogger('pyhdb')
 debug = logger.debug
 version_struct = struct.Struct('<bH')
 
+# Request and reply messages are exchanged in lockstep, so don't let Nagle's algorithm delay small requests.
+# Keepalive lets the kernel detect dead peers, e.g. pooled connections silently dropped by a firewall.
+DEFAULT_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+# Applied along with DEFAULT_SOCKET_OPTIONS where available (Linux): probe after 60s of silence, every 10s,
+# give up after 3 unanswered probes. Setting them may still fail, e.g. in sandboxes, so each is optional.
+KEEPALIVE_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, getattr(socket, name), value)
+    for name, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3))
+    if hasattr(socket, name)
+]
+
+RECV_FLAGS = getattr(socket, 'MSG_WAITALL', 0)
+
+# socket.getfqdn() may block on a reverse DNS lookup, so it is only called once per process
+_fqdn = None
+
+
+def get_client_id():
+    """Return the client id sent with CONNECT requests"""
+    global _fqdn
+    if _fqdn is None:
+        _fqdn = socket.getfqdn()
+    # Not cached as a whole, forked processes need to report their own pid
+    return "pyhdb-%s@%s" % (os.getpid(), _fqdn)
+
+
+# Requests without parts only differ in session id and packet count, which lead the message header
+control_header_struct = struct.Struct('qi')
+_control_request_templates = {}
+
+
+def pack_control_request(connection, message_type):
+    """Pack a request without parts like COMMIT, ROLLBACK or DISCONNECT
+    The message is packed once per message type and commit flag, afterwards only the
+    session id and packet count of the connection are patched into a copy.
+    :returns: bytes-like object ready to be sent
+    """
+    if pyhdb.tracing:
+        # Build the message each time so that it shows up in the trace
+        return RequestMessage.new(connection, RequestSegment(message_type)).pack().getbuffer()
+
+    key = (message_type, bool(connection.autocommit))
+    try:
+        template = _control_request_templates[key]
+    except KeyError:
+        message = RequestMessage(0, 0, RequestSegment(message_type), autocommit=connection.autocommit)
+        template = _control_request_templates[key] = message.pack().getvalue()
+
+    packed = bytearray(template)
+    control_header_struct.pack_into(packed, 0, connection.session_id, connection.get_next_packet_count())
+    return packed
 
-class Connection(object):
+
+class BaseConnection(object):
     """
-    Database connection class
+    State and protocol handling shared by Connection and pyhdb.aconnection.AsyncConnection,
+    subclasses implement the socket I/O
     """
-    def __init__(self, host, port, user, password, autocommit=False, timeout=None):
+    __slots__ = ('host', 'port', 'user', 'autocommit', 'product_version', 'protocol_version',
+                 'session_id', 'packet_count', '_socket', '_timeout', '_socket_options', '_auth_manager',
+                 '_packet_counter', '__weakref__')
+
+    def __init__(self, host, port, user, password, autocommit=False, timeout=None, socket_options=None):
         self.host = host
         self.port = port
         self.user = user
@@ -54,79 +113,216 @@ class Connection(object):
 
         self._socket = None
         self._timeout = timeout
+        self._socket_options = DEFAULT_SOCKET_OPTIONS if socket_options is None else socket_options
         self._auth_manager = AuthManager(self, user, password)
-        # It feels like the RLock has a poorer performance
-        self._socket_lock = threading.RLock()
-        self._packet_count_lock = threading.Lock()
+        # Calling next() on itertools.count is atomic in CPython, so packet counts are handed out without a lock
+        self._packet_counter = itertools.count()
+
+    def _apply_socket_options(self, sock):
+        for level, option, value in self._socket_options:
+            sock.setsockopt(level, option, value)
+        if self._socket_options is DEFAULT_SOCKET_OPTIONS:
+            for level, option, value in KEEPALIVE_SOCKET_OPTIONS:
+                try:
+                    sock.setsockopt(level, option, value)
+                except OSError:
+                    debug('Keepalive socket option %s not accepted', option)
+
+    def _process_init_reply(self, response):
+        """Take the versions from the server's reply to INITIALIZATION_BYTES"""
+        if len(response) != 8:
+            raise Exception("Connection failed")
+
+        self.product_version = version_struct.unpack_from(response, 0)
+        self.protocol_version = version_struct.unpack_from(response, 3)
+
+    def _process_reply_header(self, raw_header):
+        """Unpack the header of a reply message and keep the session id of the connection up to date"""
+        header = ReplyMessage.header_from_raw_header_data(raw_header)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # Guarded, as the header slice would be allocated for every reply otherwise
+            msg = 'Message header (32 bytes): sessionid: %d, packetcount: %d, length: %d, size: %d, noofsegm: %d'
+            debug(msg, *(header[:5]))
+
+        if self.session_id != header.session_id:
+            self.session_id = header.session_id
+            self.packet_count = -1
+            self._packet_counter = itertools.count()
+        return header
+
+    def _connect_request(self, agreed_auth_part):
+        """Return the CONNECT request message finishing the authentication handshake"""
+        return RequestMessage.new(
+            self,
+            RequestSegment(
+                message_types.CONNECT,
+                (
+                    agreed_auth_part,
+                    ClientId(get_client_id()),
+                    ConnectOptions(DEFAULT_CONNECTION_OPTIONS)
+                )
+            )
+        )
+
+    @staticmethod
+    def _check_disconnect_reply(reply):
+        if reply.segments[0].function_code != \
+           function_codes.DISCONNECT:
+            raise Error("Connection wasn't closed correctly")
+
+    def get_next_packet_count(self):
+        self.packet_count = packet_count = next(self._packet_counter)
+        return packet_count
+
+    @property
+    def closed(self):
+        return self._socket is None
+
+    def _check_closed(self):
+        if self.closed:
+            raise Error("Connection closed")
+
+
+class Connection(BaseConnection):
+    """
+    Database connection class
+    """
+    __slots__ = ('_ssl_context', '_recv_flags', '_header_buffer', '_header_view', '_payload_view',
+                 '_socket_lock')
+
+    def __init__(self, host, port, user, password, autocommit=False, timeout=None, socket_options=None,
+                 ssl_context=None):
+        """
+        :param socket_options: list of (level, option, value) tuples passed to socket.setsockopt() before
+                               connecting, defaults to DEFAULT_SOCKET_OPTIONS plus the KEEPALIVE_SOCKET_OPTIONS
+                               the platform accepts. E.g. bulk transfers of large result sets may profit from
+                               (socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20),
+                               note that a fixed buffer size disables the receive buffer autotuning of Linux.
+        :param ssl_context: ssl.SSLContext used to encrypt the connection, e.g. ssl.create_default_context().
+                            The server certificate is checked against host.
+        """
+        super(Connection, self).__init__(host, port, user, password, autocommit, timeout, socket_options)
+        self._ssl_context = ssl_context
+        # SSL sockets decrypt straight into the buffer passed to recv_into(), but don't accept any flags
+        self._recv_flags = RECV_FLAGS if ssl_context is None else 0
+        # Reply headers are always received into the same buffer, access is serialized by the socket lock
+        self._header_buffer = bytearray(ReplyMessage.header_size)
+        self._header_view = memoryview(self._header_buffer)
+        # Same for payloads of regular size, everything kept from a reply is copied out of it while parsing.
+        # Allocated with the first reply, so that connection objects which are never used don't pay for it.
+        self._payload_view = None
+        # Not reentrant: code holding the lock must use _send_request() instead of send_request()
+        self._socket_lock = threading.Lock()
 
     def __repr__(self):
         return '<Hana connection host=%s port=%s user=%s>' % (self.host, self.port, self.user)
 
     def _open_socket_and_init_protocoll(self):
-        self._socket = socket.create_connection((self.host, self.port), self._timeout)
+        self._socket = self._create_socket()
 
-        # Initialization Handshake
+        # Initialization Handshake, the server has to answer before the (already contiguous)
+        # AUTHENTICATE request may follow
         self._socket.sendall(INITIALIZATION_BYTES)
+        self._process_init_reply(self._recv_exact(8))
 
-        response = self._socket.recv(8)
-        if len(response) != 8:
-            raise Exception("Connection failed")
-
-        self.product_version = version_struct.unpack(response[0:3])
-        self.protocol_version = version_struct.unpack_from(response[3:8])
+    def _create_socket(self):
+        """Like socket.create_connection() but the socket options are set before connecting,
+        as some of them (e.g. SO_RCVBUF, which determines the TCP window scaling) only take full effect then.
+        """
+        error = None
+        for family, type_, proto, _, address in socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM):
+            sock = socket.socket(family, type_, proto)
+            try:
+                self._apply_socket_options(sock)
+                sock.settimeout(self._timeout)
+                sock.connect(address)
+                if self._ssl_context is not None:
+                    sock = self._ssl_context.wrap_socket(sock, server_hostname=self.host)
+                return sock
+            except socket.error as exc:
+                sock.close()
+                error = exc
+
+        if error is None:
+            raise socket.error("getaddrinfo returns an empty list")
+        raise error
 
     def send_request(self, message):
         """Send message request to HANA db and return reply message
         :param message: Instance of Message object containing segments and parts of a HANA db request
         :returns: Instance of reply Message object
         """
-        payload = message.pack()  # obtain BytesIO instance
-        return self.__send_message_recv_reply(payload.getvalue())
+        payload = message.pack()  # obtain BytesIO instance, its buffer is sent without a copy
+        with self._socket_lock:
+            return self.__send_message_recv_reply(payload.getbuffer())
+
+    def _send_request(self, message):
+        """Same as send_request() but for callers which already hold the socket lock"""
+        payload = message.pack()
+        return self.__send_message_recv_reply(payload.getbuffer())
 
     def __send_message_recv_reply(self, packed_message):
         """
         Private method to send packed message and receive the reply message.
-        :param packed_message: a binary string containing the entire message payload
+        :param packed_message: a bytes-like object containing the entire message payload
         """
-        payload = io.BytesIO()
         try:
-            with self._socket_lock:
-                self._socket.sendall(packed_message)
-
-                # Read first message header
-                raw_header = self._socket.recv(32)
-                header = ReplyMessage.header_from_raw_header_data(raw_header)
-
-                # from pyhdb.lib.stringlib import allhexlify
-                # print 'Raw msg header:', allhexlify(raw_header)
-                msg = 'Message header (32 bytes): sessionid: %d, packetcount: %d, length: %d, size: %d, noofsegm: %d'
-                debug(msg, *(header[:5]))
-
-                # Receive complete message payload
-                while payload.tell() < header.payload_length:
-                    _payload = self._socket.recv(header.payload_length - payload.tell())
-                    if not _payload:
-                        break   # jump out without any warning??
-                    payload.write(_payload)
-
-                debug('Read %d bytes payload from socket', payload.tell())
-
-                # Keep session id of connection up to date
-                if self.session_id != header.session_id:
-                    self.session_id = header.session_id
-                    self.packet_count = -1
+            self._socket.sendall(packed_message)
+
+            # Read first message header into the buffer kept for that purpose
+            received = self._recv_into(self._header_buffer)
+            raw_header = self._header_view[:received]
+            header = self._process_reply_header(raw_header)
+
+            # Receive complete message payload directly into a preallocated buffer
+            payload = self._recv_payload(header.payload_length)
+            if logger.isEnabledFor(logging.DEBUG):
+                debug('Read %d bytes payload from socket', len(payload))
         except socket.timeout:
             raise ConnectionTimedOutError()
         except (IOError, OSError) as error:
             raise OperationalError("Lost connection to HANA server (%r)" % error)
 
-        payload.seek(0)  # set pointer position to beginning of buffer
         return ReplyMessage.unpack_reply(header, payload)
 
-    def get_next_packet_count(self):
-        with self._packet_count_lock:
-            self.packet_count += 1
-            return self.packet_count
+    def _recv_payload(self, size):
+        """Receive the payload of a reply message, if possible into the buffer reused for all replies
+        :returns: memoryview, only shorter than size if the connection was closed by the server
+        """
+        if size <= MAX_MESSAGE_SIZE:
+            if self._payload_view is None:
+                self._payload_view = memoryview(bytearray(MAX_MESSAGE_SIZE))
+            buffer = self._payload_view[:size]
+        else:
+            buffer = memoryview(bytearray(size))
+        received = self._recv_into(buffer)
+        return buffer[:received]
+
+    def _recv_exact(self, size):
+        """Receive size bytes from the socket
+        :returns: bytearray, only shorter than size if the connection was closed by the server
+        """
+        buffer = bytearray(size)
+        received = self._recv_into(buffer)
+        if received < size:
+            return buffer[:received]   # jump out without any warning??
+        return buffer
+
+    def _recv_into(self, buffer):
+        """Fill given buffer with data from the socket
+        :returns: number of bytes received, only less than len(buffer) if the connection was closed by the server
+        """
+        view = memoryview(buffer)
+        size = len(view)
+        received = 0
+        while received < size:
+            # MSG_WAITALL lets the kernel wait for the whole remainder instead of returning every TCP segment
+            _received = self._socket.recv_into(view[received:], size - received, self._recv_flags)
+            if not _received:
+                break
+            received += _received
+        return received
 
     def connect(self):
         with self._socket_lock:
@@ -139,21 +335,7 @@ class Connection(object):
             # Perform the authenication handshake and get the part
             # with the agreed authentication data
             agreed_auth_part = self._auth_manager.perform_handshake()
-
-            request = RequestMessage.new(
-                self,
-                RequestSegment(
-                    message_types.CONNECT,
-                    (
-                        agreed_auth_part,
-                        ClientId(
-                            "pyhdb-%s@%s" % (os.getpid(), socket.getfqdn())
-                        ),
-                        ConnectOptions(DEFAULT_CONNECTION_OPTIONS)
-                    )
-                )
-            )
-            self.send_request(request)
+            self._send_request(self._connect_request(agreed_auth_part))
 
     def close(self):
         with self._socket_lock:
@@ -161,26 +343,12 @@ class Connection(object):
                 raise Error("Connection already closed")
 
             try:
-                request = RequestMessage.new(
-                    self,
-                    RequestSegment(message_types.DISCONNECT)
-                )
-                reply = self.send_request(request)
-                if reply.segments[0].function_code != \
-                   function_codes.DISCONNECT:
-                    raise Error("Connection wasn't closed correctly")
+                reply = self.__send_message_recv_reply(pack_control_request(self, message_types.DISCONNECT))
+                self._check_disconnect_reply(reply)
             finally:
                 self._socket.close()
                 self._socket = None
 
-    @property
-    def closed(self):
-        return self._socket is None
-
-    def _check_closed(self):
-        if self.closed:
-            raise Error("Connection closed")
-
     def cursor(self):
         """Return a new Cursor Object using the connection."""
         self._check_closed()
@@ -190,20 +358,16 @@ class Connection(object):
     def commit(self):
         self._check_closed()
 
-        request = RequestMessage.new(
-            self,
-            RequestSegment(message_types.COMMIT)
-        )
-        self.send_request(request)
+        packed = pack_control_request(self, message_types.COMMIT)
+        with self._socket_lock:
+            self.__send_message_recv_reply(packed)
 
     def rollback(self):
         self._check_closed()
 
-        request = RequestMessage.new(
-            self,
-            RequestSegment(message_types.ROLLBACK)
-        )
-        self.send_request(request)
+        packed = pack_control_request(self, message_types.ROLLBACK)
+        with self._socket_lock:
+            self.__send_message_recv_reply(packed)
 
     @property
     def timeout(self):
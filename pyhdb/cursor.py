@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import collections
+import itertools
 ###
 from pyhdb.protocol.message import RequestMessage
 from pyhdb.protocol.segments import RequestSegment
@@ -20,12 +21,14 @@ from pyhdb.protocol.types import escape_values, by_type_code
 from pyhdb.protocol.parts import Command, FetchSize, ResultSetId, StatementId, Parameters, WriteLobRequest
 from pyhdb.protocol.constants import message_types, function_codes, part_kinds
 from pyhdb.exceptions import ProgrammingError, InterfaceError, DatabaseError
-from pyhdb.compat import izip
 
-FORMAT_OPERATION_ERRORS = [
+# An exhausted iterator stays exhausted, so all cursors without rows can share it
+EMPTY_ROWS = iter(())
+
+FORMAT_OPERATION_ERRORS = frozenset([
     'not enough arguments for format string',
     'not all arguments converted during string formatting'
-]
+])
 
 
 def format_operation(operation, parameters=None):
@@ -43,11 +46,21 @@ def format_operation(operation, parameters=None):
     return operation
 
 
+def sum_rowcounts(rowcounts):
+    """Add up row counts, e.g. of the rows of a batch. The total is -1 (unknown) if any count is negative,
+    HANA e.g. sends -2 for rows which were processed without a count.
+    """
+    total = 0
+    for rowcount in rowcounts:
+        if rowcount < 0:
+            return -1
+        total += rowcount
+    return total
+
+
 class PreparedStatement(object):
     """Reference object to a prepared statement including parameter (meta) data"""
 
-    ParamTuple = collections.namedtuple('Parameter', 'id type_code length value')
-
     def __init__(self, connection, statement_id, params_metadata, result_metadata_part):
         """Initialize PreparedStatement part object
         :param connection: connection object
@@ -59,7 +72,12 @@ class PreparedStatement(object):
         self._connection = connection
         self.statement_id = statement_id
         self._params_metadata = params_metadata
+        # Only the values differ between rows, so the metadata of each parameter is picked once
+        self._params_plan = tuple((p.id, p.datatype, p.length) for p in params_metadata)
+        self._num_params = len(params_metadata)
         self.result_metadata_part = result_metadata_part
+        # (description, column types) decoded from result_metadata_part, set by the first execution
+        self._result_metadata = None
         self._multi_row_parameters = None
         self._num_rows = None
         self._iter_row_count = None
@@ -84,9 +102,6 @@ class PreparedStatement(object):
     def __bool__(self):
         return self._iter_row_count < self._num_rows
 
-    # Python 2.7 compat
-    __nonzero__ = __bool__
-
     def __next__(self):
         if self._iter_row_count == self._num_rows:
             raise StopIteration()
@@ -96,16 +111,14 @@ class PreparedStatement(object):
             raise ProgrammingError("Prepared statement parameters supplied as %s, shall be list, tuple or dict." %
                                    type(parameters).__name__)
 
-        if len(parameters) != len(self._params_metadata):
+        if len(parameters) != self._num_params:
             raise ProgrammingError("Prepared statement parameters expected %d supplied %d." %
-                                   (len(self._params_metadata), len(parameters)))
-        row_params = [self.ParamTuple(p.id, p.datatype, p.length, parameters[i]) for i, p in enumerate(self._params_metadata)]
+                                   (self._num_params, len(parameters)))
+        # Plain (id, type_code, length, value) tuples, a namedtuple per value would be much more expensive
+        row_params = [plan + (parameters[i],) for i, plan in enumerate(self._params_plan)]
         self._iter_row_count += 1
         return row_params
 
-    # Python 2.7 compat
-    next = __next__
-
     def back(self):
         assert self._iter_row_count > 0, 'already stepped back to beginning of iterator data'
         self._iter_row_count -= 1
@@ -113,9 +126,12 @@ class PreparedStatement(object):
 
 class Cursor(object):
     """Database cursor class"""
+    # Number of statements kept per cursor which HANA refused to prepare
+    FORMATTED_STATEMENTS_CACHE_SIZE = 128
+
     def __init__(self, connection):
         self.connection = connection
-        self._buffer = iter([])
+        self._buffer = EMPTY_ROWS
         self._received_last_resultset_part = False
         self._executed = None
 
@@ -124,7 +140,12 @@ class Cursor(object):
         self.description = None
         self.rownumber = None
         self.arraysize = 1
+        # Minimum number of rows requested per FETCHNEXT round trip, rows not asked for yet are kept for
+        # the next fetch*() call. E.g. a loop over fetchone() needs one round trip per prefetchrows rows.
+        self.prefetchrows = 32
         self._prepared_statements = {}
+        # Statements HANA refused to prepare because of Python style parameters, most recently used last
+        self._formatted_statements = collections.OrderedDict()
 
     @property
     def prepared_statement_ids(self):
@@ -177,6 +198,9 @@ class Cursor(object):
         # Convert parameters into a generator producing lists with parameters as named tuples (incl. some meta data):
         parameters = prepared_statement.prepare_parameters(multi_row_parameters)
 
+        # All rows which fit into one message are sent in a single EXECUTE request,
+        # row counts of DML statements are collected over all requests
+        rowcounts = []
         while parameters:
             request = RequestMessage.new(
                 self.connection,
@@ -191,9 +215,10 @@ class Cursor(object):
             parts = reply.segments[0].parts
             function_code = reply.segments[0].function_code
             if function_code == function_codes.SELECT:
-                self._handle_select(parts, prepared_statement.result_metadata_part)
+                self._handle_prepared_select(parts, prepared_statement)
             elif function_code in function_codes.DML:
                 self._handle_upsert(parts, request.segments[0].parts[1].unwritten_lobs)
+                rowcounts.append(self.rowcount)
             elif function_code == function_codes.DDL:
                 # No additional handling is required
                 pass
@@ -202,6 +227,9 @@ class Cursor(object):
             else:
                 raise InterfaceError("Invalid or unsupported function code received: %d" % function_code)
 
+        if rowcounts:
+            self.rowcount = sum_rowcounts(rowcounts)
+
     def _execute_direct(self, operation):
         """Execute statements which are not going through 'prepare_statement' (aka 'direct execution').
         Either their have no parameters, or Python's string expansion has been applied to the SQL statement.
@@ -266,6 +294,17 @@ class Cursor(object):
         :param parameters: a nested list/tuple of parameters for multiple rows
         :returns: this cursor
         """
+        self._check_closed()
+        if not parameters:
+            # Nothing to execute, so don't pay for a PREPARE round trip either
+            return self
+
+        if statement in self._formatted_statements:
+            # Known to fail in PREPARE, don't waste another round trip on it
+            self._formatted_statements.move_to_end(statement)
+            self._execute_formatted(statement, parameters)
+            return self
+
         # First try safer hana-style parameter expansion:
         try:
             statement_id = self.prepare(statement)
@@ -275,9 +314,10 @@ class Cursor(object):
                 # Probably some other error than related to string expansion -> raise an error
                 raise
             # Statement contained percentage char, so perform Python style parameter expansion:
-            for row_params in parameters:
-                operation = format_operation(statement, row_params)
-                self._execute_direct(operation)
+            self._formatted_statements[statement] = True
+            if len(self._formatted_statements) > self.FORMATTED_STATEMENTS_CACHE_SIZE:
+                self._formatted_statements.popitem(last=False)
+            self._execute_formatted(statement, parameters)
         else:
             # Continue with Hana style statement execution:
             prepared_statement = self.get_prepared_statement(statement_id)
@@ -285,6 +325,16 @@ class Cursor(object):
         # Return cursor object:
         return self
 
+    def _execute_formatted(self, statement, parameters):
+        """Execute statement once per row after Python style parameter expansion"""
+        rowcounts = []
+        for row_params in parameters:
+            operation = format_operation(statement, row_params)
+            self._execute_direct(operation)
+            rowcounts.append(self.rowcount)
+        # Rows affected by all statements, -1 for SELECT statements like for a single one
+        self.rowcount = sum_rowcounts(rowcounts)
+
     def _handle_upsert(self, parts, unwritten_lobs=()):
         """Handle reply messages from INSERT or UPDATE statements"""
         self.description = None
@@ -292,7 +342,8 @@ class Cursor(object):
 
         for part in parts:
             if part.kind == part_kinds.ROWSAFFECTED:
-                self.rowcount = part.values[0]
+                # One count per row of a batch
+                self.rowcount = sum_rowcounts(part.values)
             elif part.kind in (part_kinds.TRANSACTIONFLAGS, part_kinds.STATEMENTCONTEXT, part_kinds.PARAMETERMETADATA):
                 pass
             elif part.kind == part_kinds.WRITELOBREPLY:
@@ -301,7 +352,7 @@ class Cursor(object):
                 # with LobBuffer instances.
                 # Those instances are in the same order as 'locator_ids' received in the reply message. These IDs
                 # are then used to deliver the missing LOB data to the server via WRITE_LOB_REQUESTs.
-                for lob_buffer, lob_locator_id in izip(unwritten_lobs, part.locator_ids):
+                for lob_buffer, lob_locator_id in zip(unwritten_lobs, part.locator_ids):
                     # store locator_id in every lob buffer instance for later reference:
                     lob_buffer.locator_id = lob_locator_id
                 self._perform_lob_write_requests(unwritten_lobs)
@@ -325,27 +376,44 @@ class Cursor(object):
             )
             self.connection.send_request(request)
 
-    def _handle_select(self, parts, result_metadata=None):
+    def _handle_select(self, parts):
         """Handle reply messages from SELECT statements"""
         self.rowcount = -1
-        if result_metadata is not None:
-            # Select was prepared and we can use the already received metadata
-            self.description, self._column_types = self._handle_result_metadata(result_metadata)
 
         for part in parts:
-            if part.kind == part_kinds.RESULTSETID:
-                self._resultset_id = part.value
-            elif part.kind == part_kinds.RESULTSETMETADATA:
-                self.description, self._column_types = self._handle_result_metadata(part)
-            elif part.kind == part_kinds.RESULTSET:
-                self._buffer = part.unpack_rows(self._column_types, self.connection)
-                self._received_last_resultset_part = part.attribute & 1
-                self._executed = True
+            if self._handle_resultset_part(part):
+                pass
             elif part.kind in (part_kinds.STATEMENTCONTEXT, part_kinds.TRANSACTIONFLAGS, part_kinds.PARAMETERMETADATA):
                 pass
             else:
                 raise InterfaceError("Prepared select statement response, unexpected part kind %d." % part.kind)
 
+    def _handle_resultset_part(self, part):
+        """Take over result set id, metadata or rows from a reply part, shared by SELECT and procedure calls
+        :returns: False if the part doesn't belong to a result set
+        """
+        if part.kind == part_kinds.RESULTSETID:
+            self._resultset_id = part.value
+        elif part.kind == part_kinds.RESULTSETMETADATA:
+            self.description, self._column_types = self._handle_result_metadata(part)
+        elif part.kind == part_kinds.RESULTSET:
+            self._buffer = part.unpack_rows(self._column_types, self.connection)
+            self._received_last_resultset_part = part.attribute & 1
+            self._executed = True
+        else:
+            return False
+        return True
+
+    def _handle_prepared_select(self, parts, prepared_statement):
+        """Handle reply messages from prepared SELECT statements, their result metadata is only decoded once"""
+        if prepared_statement._result_metadata is None and prepared_statement.result_metadata_part is not None:
+            prepared_statement._result_metadata = self._handle_result_metadata(
+                prepared_statement.result_metadata_part
+            )
+        if prepared_statement._result_metadata is not None:
+            self.description, self._column_types = prepared_statement._result_metadata
+        self._handle_select(parts)
+
     def _handle_dbproc_call(self, parts, parameters_metadata):
         """Handle reply messages from STORED PROCEDURE statements"""
         for part in parts:
@@ -358,15 +426,8 @@ class Cursor(object):
             elif part.kind == part_kinds.OUTPUTPARAMETERS:
                 self._buffer = part.unpack_rows(parameters_metadata, self.connection)
                 self._received_last_resultset_part = True
-                self._executed = True
-            elif part.kind == part_kinds.RESULTSETMETADATA:
-                self.description, self._column_types = self._handle_result_metadata(part)
-            elif part.kind == part_kinds.RESULTSETID:
-                self._resultset_id = part.value
-            elif part.kind == part_kinds.RESULTSET:
-                self._buffer = part.unpack_rows(self._column_types, self.connection)
-                self._received_last_resultset_part = part.attribute & 1
-                self._executed = True
+            elif self._handle_resultset_part(part):
+                pass
             else:
                 raise InterfaceError("Stored procedure call, unexpected part kind %d." % part.kind)
         self._executed = True
@@ -377,9 +438,10 @@ class Cursor(object):
         for column in result_metadata.columns:
             description.append((column[8], column[1], None, column[3], column[2], None, column[0] & 0b10))
 
-            if column[1] not in by_type_code:
+            column_type = by_type_code.get(column[1])
+            if column_type is None:
                 raise InterfaceError("Unknown column data type: %s" % column[1])
-            column_types.append(by_type_code[column[1]])
+            column_types.append(column_type)
 
         return tuple(description), tuple(column_types)
 
@@ -394,24 +456,24 @@ class Cursor(object):
         if size is None:
             size = self.arraysize
 
-        result = []
-        cnt = 0
-        while cnt != size:
-            try:
-                result.append(next(self._buffer))
-                cnt += 1
-            except StopIteration:
-                break
+        result = list(itertools.islice(self._buffer, size))
+        missing = size - len(result)
 
-        if cnt == size or self._received_last_resultset_part:
+        if not missing or self._received_last_resultset_part:
             # No rows are missing or there are no additional rows
             return result
 
+        self._fetch_next_part(max(missing, self.prefetchrows))
+        result.extend(itertools.islice(self._buffer, missing))
+        return result
+
+    def _fetch_next_part(self, size):
+        """Request the next part of the result set with up to size rows, its rows replace the buffer"""
         request = RequestMessage.new(
             self.connection,
             RequestSegment(
                 message_types.FETCHNEXT,
-                (ResultSetId(self._resultset_id), FetchSize(size - cnt))
+                (ResultSetId(self._resultset_id), FetchSize(size))
             )
         )
         response = self.connection.send_request(request)
@@ -419,17 +481,22 @@ class Cursor(object):
         resultset_part = response.segments[0].parts[1]
         if resultset_part.attribute & 1:
             self._received_last_resultset_part = True
-        result.extend(resultset_part.unpack_rows(self._column_types, self.connection))
-        return result
+        self._buffer = resultset_part.unpack_rows(self._column_types, self.connection)
 
     def fetchone(self):
         """Fetch one row from select result set.
         :returns: a single row tuple
         """
-        result = self.fetchmany(size=1)
-        if result:
-            return result[0]
-        return None
+        self._check_closed()
+        if not self._executed:
+            raise ProgrammingError("Require execute() first")
+
+        # Rows are tuples, so None only shows up once the buffer is exhausted
+        row = next(self._buffer, None)
+        if row is None and not self._received_last_resultset_part:
+            self._fetch_next_part(max(1, self.prefetchrows))
+            row = next(self._buffer, None)
+        return row
 
     FETCHALL_BLOCKSIZE = 1024
 
@@ -12,8 +12,9 @@
 # either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-import re
-import binascii
+# Hex representations of all byte values, so that formatting needs just one lookup per byte
+_HEX_TABLE = [('%02x' % i).encode('ascii') for i in range(256)]
+_ALLHEX_TABLE = [b'\\x' + hx for hx in _HEX_TABLE]
 
 
 def allhexlify(data):
@@ -23,8 +24,7 @@ def allhexlify(data):
     becomes
         '\x61\x62\x04\x63\x65'
     """
-    hx = binascii.hexlify(data)
-    return b''.join([b'\\x' + o for o in re.findall(b'..', hx)])
+    return b''.join([_ALLHEX_TABLE[c] for c in bytearray(data)])
 
 
 def humanhexlify(data, n=-1):
@@ -45,8 +45,7 @@ def humanhexlify(data, n=-1):
     tail = b' ...' if 0 < n < len(data) else b''
     if tail:
         data = data[:n]
-    hx = binascii.hexlify(data)
-    return b' '.join(re.findall(b'..', hx)) + tail
+    return b' '.join([_HEX_TABLE[c] for c in bytearray(data)]) + tail
 
 
 def dehexlify(hx):
@@ -56,4 +55,8 @@ def dehexlify(hx):
     becomes
         'ab\x04ce'
     """
-    return binascii.unhexlify(hx.replace(' ', ''))
+    if isinstance(hx, bytes):
+        # e.g. the output of humanhexlify()
+        hx = hx.decode('ascii')
+    # Skips the white spaces itself, no stripped copy of the string needed
+    return bytes.fromhex(hx)
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from __future__ import print_function
-import io
 import pyhdb
 
 
@@ -33,8 +32,10 @@ class TraceLogger(object):
 
     def __init__(self):
         self._indent_level = 0
-        self._indent_level_is_first = {0: True}
-        self._buffer = io.StringIO()
+        # One flag per open brace, whether nothing was written at that level yet
+        self._is_first = [True]
+        # Trace output is made of many tiny strings, they are joined once in getvalue()
+        self._buffer = []
 
     def trace(self, trace_obj):
         """
@@ -75,25 +76,24 @@ class TraceLogger(object):
         return self.getvalue()
 
     def incr(self, brace):
-        self._buffer.write(u'%s\n' % brace)
+        self._buffer.append(brace + u'\n')
         self._indent_level += self._indent_incr
-        self._indent_level_is_first[self._indent_level] = True
+        self._is_first.append(True)
 
     def decr(self, brace):
         assert self._indent_level > 0, 'Indentation level cannot be decremented any further'
-        self._buffer.write(u'\n')
         self._indent_level -= self._indent_incr
-        self._buffer.write(u' ' * self._indent_level)
-        self._buffer.write(u'%s' % brace)
+        self._is_first.pop()
+        self._buffer.append(u'\n' + u' ' * self._indent_level + brace)
 
     def writeln(self, line):
-        if self._indent_level_is_first[self._indent_level]:
-            self._indent_level_is_first[self._indent_level] = False
+        if self._is_first[-1]:
+            self._is_first[-1] = False
         else:
-            self._buffer.write(u',\n')
+            self._buffer.append(u',\n')
 
-        self._buffer.write(u' ' * self._indent_level)
-        self._buffer.write(line)
+        self._buffer.append(u' ' * self._indent_level)
+        self._buffer.append(line)
 
     def getvalue(self):
-        return self._buffer.getvalue()
+        return u''.join(self._buffer)
@@ -0,0 +1,215 @@
+# Copyright 2014, 2015 SAP SE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import contextlib
+import collections
+import threading
+import logging
+###
+from pyhdb.connection import Connection
+from pyhdb.exceptions import Error
+
+logger = logging.getLogger('pyhdb')
+
+
+class PoolError(Error):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    Pool of authenticated connections to one HANA database
+
+    Connections handed out by getconn() or acquire() must be given back with putconn() (or release()).
+    Up to minconn idle connections are kept open for reuse, so that callers
+    don't pay for the TCP and authentication handshake on every connect.
+    Connections which were idle for more than idle_timeout seconds are checked
+    with a ROLLBACK round trip before they are handed out again.
+    Pass an ssl.SSLContext as ssl_context to encrypt all connections of the pool with TLS.
+    """
+    def __init__(self, minconn, maxconn, host, port, user, password, autocommit=False, idle_timeout=300,
+                 ssl_context=None):
+        if minconn > maxconn:
+            raise ValueError("minconn must not be larger than maxconn")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.host = host
+        self.port = port
+        self.user = user
+        self.autocommit = autocommit
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context
+        self.closed = False
+
+        self._password = password
+        # Idle connections are kept as (connection, idle since) tuples, most recently returned last
+        self._idle = collections.deque()
+        self._used = set()
+        # Slots taken by acquire() calls which are connecting or checking a connection outside of the lock
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.time()))
+
+    def __repr__(self):
+        return '<Hana connection pool host=%s port=%s user=%s>' % (self.host, self.port, self.user)
+
+    def _connect(self):
+        conn = Connection(self.host, self.port, self.user, self._password, self.autocommit,
+                          ssl_context=self.ssl_context)
+        conn.connect()
+        return conn
+
+    def getconn(self):
+        """Return an open connection, either an idle one from the pool or a new one
+        Raises PoolError if maxconn connections are in use.
+        """
+        return self.acquire(block=False)
+
+    def acquire(self, block=True, timeout=None):
+        """Return an open connection, either an idle one from the pool or a new one
+        :param block: wait for another connection to be given back if maxconn connections are in use,
+                      otherwise raise PoolError
+        :param timeout: maximum number of seconds to wait, None waits forever
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._available:
+            while True:
+                if self.closed:
+                    raise PoolError("Connection pool closed")
+
+                # Only reserve a slot here, network round trips happen outside of the lock
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if len(self._used) + self._pending < self.maxconn:
+                    conn = idle_since = None
+                    break
+
+                if not block:
+                    raise PoolError("Connection pool exhausted")
+                if deadline is None:
+                    self._available.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise PoolError("Connection pool exhausted")
+                    self._available.wait(remaining)
+            self._pending += 1
+
+        try:
+            conn = self._checkout(conn, idle_since)
+        except BaseException:
+            self._release_slot()
+            raise
+
+        with self._available:
+            self._pending -= 1
+            if not self.closed:
+                self._used.add(conn)
+                return conn
+            self._available.notify()
+        self._close(conn)
+        raise PoolError("Connection pool closed")
+
+    def _checkout(self, conn, idle_since):
+        """Return conn if it is still usable, otherwise a new connection"""
+        if conn is not None:
+            # Sockets closed by the client are just dropped, long idle ones may have been dropped by the server
+            if not conn.closed and (time.time() - idle_since <= self.idle_timeout or self._is_alive(conn)):
+                return conn
+            if not conn.closed:
+                logger.debug('Discarding stale connection %r', conn)
+                self._close(conn)
+        return self._connect()
+
+    def _release_slot(self):
+        with self._available:
+            self._pending -= 1
+            self._available.notify()
+
+    @staticmethod
+    def _is_alive(conn):
+        try:
+            conn.rollback()
+        except Error:
+            return False
+        return True
+
+    def putconn(self, conn, close=False):
+        """Give a connection obtained by getconn() back to the pool
+        :param close: close the connection instead of keeping it for reuse
+        """
+        with self._available:
+            if conn not in self._used:
+                raise PoolError("Connection not taken from this pool")
+            keep = not close and not self.closed and not conn.closed and len(self._idle) < self.minconn
+
+        if keep and not conn.autocommit:
+            # Don't leak an open transaction to the next user. The connection keeps its slot
+            # until then, but the lock is not held during the round trip.
+            try:
+                conn.rollback()
+            except Error:
+                logger.debug('Discarding broken connection %r', conn)
+                keep = False
+
+        with self._available:
+            self._used.discard(conn)
+            # Either way there is room for another connection now
+            self._available.notify()
+            if keep and not self.closed and len(self._idle) < self.minconn:
+                self._idle.append((conn, time.time()))
+                return
+
+        self._close(conn)
+
+    release = putconn
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Context manager borrowing a connection from the pool
+        The connection is given back when the block is left, uncommitted changes are rolled back.
+        """
+        conn = self.acquire(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        """Close all connections of the pool, including those currently in use"""
+        with self._available:
+            self.closed = True
+            conns = [conn for conn, _ in self._idle] + list(self._used)
+            self._idle.clear()
+            self._used.clear()
+            self._available.notify_all()
+
+        # Each close is a DISCONNECT round trip, so they are done without holding the lock
+        for conn in conns:
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        if conn.closed:
+            return
+        try:
+            conn.close()
+        except Error:
+            logger.debug('Failed to close connection %r', conn)
@@ -19,24 +19,9 @@ from pyhdb.protocol.message import RequestMessage
 from pyhdb.protocol.segments import RequestSegment
 from pyhdb.protocol.constants import message_types, type_codes
 from pyhdb.protocol.parts import ReadLobRequest
-from pyhdb.compat import PY2, PY3, byte_type
-
-if PY2:
-    # Depending on the Python version we use different underlying containers for CLOB strings
-    import StringIO
-    import cStringIO
-    CLOB_STRING_IO_CLASSES = (StringIO.StringIO, cStringIO.InputType, cStringIO.OutputType)
-
-    def CLOB_STRING_IO(init_value):
-        # factory function to obtain a read-writable StringIO object
-        # (not possible when directly instantiated with initial value ...)
-        c = cStringIO.StringIO()
-        c.write(init_value)
-        c.seek(0)
-        return c
-else:
-    CLOB_STRING_IO_CLASSES = (io.StringIO, )
-    CLOB_STRING_IO = io.StringIO
+
+CLOB_STRING_IO_CLASSES = (io.StringIO, )
+CLOB_STRING_IO = io.StringIO
 
 
 logger = logging.getLogger('pyhdb')
@@ -58,7 +43,7 @@ def from_payload(type_code, payload, connection):
         data = payload.read(lob_header.chunk_length)
         _LobClass = LOB_TYPE_CODE_MAP[type_code]
         lob = _LobClass.from_payload(data, lob_header, connection)
-        logger.debug('Lob Header %r' % lob)
+        logger.debug('Lob Header %r', lob)
     return lob
 
 
@@ -151,7 +136,7 @@ class Lob(object):
 
     def _read_missing_lob_data_from_db(self, readoffset, readlength):
         """Read LOB request part from database"""
-        logger.debug('Reading missing lob data from db. Offset: %d, readlength: %d' % (readoffset, readlength))
+        logger.debug('Reading missing lob data from db. Offset: %d, readlength: %d', readoffset, readlength)
         lob_data = self._make_read_lob_request(readoffset, readlength)
 
         # make sure we really got as many items (not bytes!) as requested:
@@ -231,25 +216,17 @@ class Clob(_CharLob):
     type_code = type_codes.CLOB
     encoding = 'ascii'
 
-    def __unicode__(self):
-        """Convert lob into its unicode format"""
-        return self.data.getvalue().decode(self.encoding)
-
     def _init_io_container(self, init_value):
         """Initialize container to hold lob data.
-        Here either a cStringIO or a io.StringIO class is used depending on the Python version.
         For CLobs ensure that an initial unicode value only contains valid ascii chars.
         """
         if isinstance(init_value, CLOB_STRING_IO_CLASSES):
             # already a valid StringIO instance, just use it as it is
             v = init_value
         else:
-            # works for strings and unicodes. However unicodes must only contain valid ascii chars!
-            if PY3:
-                # a io.StringIO also accepts any unicode characters, but we must be sure that only
-                # ascii chars are contained. In PY2 we use a cStringIO class which complains by itself
-                # if it catches this case, so in PY2 no extra check needs to be performed here.
-                init_value.encode('ascii')  # this is just a check, result not needed!
+            # a io.StringIO also accepts any unicode characters, but we must be sure that only
+            # ascii chars are contained.
+            init_value.encode('ascii')  # this is just a check, result not needed!
             v = CLOB_STRING_IO(init_value)
         return v
 
@@ -259,19 +236,13 @@ class NClob(_CharLob):
     type_code = type_codes.NCLOB
     encoding = 'utf8'
 
-    def __unicode__(self):
-        """Convert lob into its unicode format"""
-        return self.data.getvalue()
-
     def _init_io_container(self, init_value):
         if isinstance(init_value, io.StringIO):
             return init_value
 
-        if PY2 and isinstance(init_value, str):
+        if isinstance(init_value, bytes):
             # io.String() only accepts unicode values, so do necessary conversion here:
             init_value = init_value.decode(self.encoding)
-        if PY3 and isinstance(init_value, byte_type):
-            init_value = init_value.decode(self.encoding)
 
         return io.StringIO(init_value)
 
@@ -54,7 +54,7 @@ class RequestMessage(BaseMessage):
         # Write out payload of segments and parts:
         self.build_payload(payload)
 
-        packet_length = len(payload.getvalue()) - self.header_size
+        packet_length = payload.tell() - self.header_size
         self.header = MessageHeader(self.session_id, self.packet_count, packet_length, constants.MAX_SEGMENT_SIZE,
                                     num_segments=len(self.segments), packet_options=0)
         packed_header = self.header_struct.pack(*self.header)
@@ -85,7 +85,7 @@ class ReplyMessage(BaseMessage):
     def unpack_reply(cls, header, payload):
         """Take already unpacked header and binary payload of received request reply and creates message instance
         :param header: a namedtuple header object providing header information
-        :param payload: payload (BytesIO instance) of message
+        :param payload: payload of message, preferably a memoryview so that segments and parts are parsed without copies
         """
         reply = cls(
             header.session_id, header.packet_count,
@@ -102,7 +102,7 @@ class ReplyMessage(BaseMessage):
         :returns: named tuple for easy access of header data
         """
         try:
-            header = MessageHeader(*cls.header_struct.unpack(raw_header))
+            header = MessageHeader._make(cls.header_struct.unpack(raw_header))
         except struct.error:
             raise Exception("Invalid message header received")
         return header
@@ -20,6 +20,7 @@ import io
 import struct
 import logging
 from collections import namedtuple
+from functools import lru_cache
 from weakref import WeakValueDictionary
 ###
 import pyhdb
@@ -28,23 +29,32 @@ from pyhdb.protocol import types
 from pyhdb.protocol import constants
 from pyhdb.protocol.types import by_type_code
 from pyhdb.exceptions import InterfaceError, DatabaseError, DataError, IntegrityError
-from pyhdb.compat import is_text, iter_range, with_metaclass, string_types, byte_type
 from pyhdb.protocol.headers import ReadLobHeader, PartHeader, WriteLobHeader
-from pyhdb.protocol.constants import parameter_direction
+from pyhdb.protocol.constants import parameter_direction, part_kinds  # noqa: F401, registers constants.part_kinds
 
 logger = logging.getLogger('pyhdb')
 debug = logger.debug
 
 PART_MAPPING = WeakValueDictionary()
 
+# Part payloads are aligned to multiples of 8 bytes, padding is sliced from here
+PADDING = b"\x00" * 7
+
+# Parameters of these types are sent as a header, followed by their data at the end of the row
+LOB_TYPE_CODES = frozenset([types.BlobType.type_code, types.ClobType.type_code, types.NClobType.type_code])
+
 
 class Fields(object):
 
+    count_struct = struct.Struct('<H')
+    size_struct = struct.Struct('B')
+    long_size_struct = struct.Struct('H')
+
     @staticmethod
     def pack_data(fields):
         payload = struct.pack('<H', len(fields))
         for field in fields:
-            if is_text(field):
+            if isinstance(field, str):
                 field = field.encode('cesu-8')
 
             size = len(field)
@@ -59,7 +69,7 @@ class Fields(object):
         length = struct.unpack('<H', payload.read(2))[0]
         fields = []
 
-        for _ in iter_range(0, length):
+        for _ in range(0, length):
             size = payload.read(1)
             if size == b"\xFF":
                 size = struct.unpack('H', payload.read(2))[0]
@@ -69,6 +79,26 @@ class Fields(object):
             fields.append(payload.read(size))
         return fields
 
+    @classmethod
+    def unpack_from(cls, buffer, offset=0):
+        """Unpack fields directly from a bytes object, starting at the given offset
+        Other than unpack_data() this doesn't require the data to be wrapped into a file-like object.
+        """
+        length = cls.count_struct.unpack_from(buffer, offset)[0]
+        offset += 2
+        fields = []
+
+        for _ in range(0, length):
+            size = cls.size_struct.unpack_from(buffer, offset)[0]
+            offset += 1
+            if size == 0xFF:
+                size = cls.long_size_struct.unpack_from(buffer, offset)[0]
+                offset += 2
+
+            fields.append(buffer[offset:offset + size])
+            offset += size
+        return fields
+
 
 class PartMeta(type):
     """
@@ -84,7 +114,7 @@ class PartMeta(type):
         return part_class
 
 
-class Part(with_metaclass(PartMeta, object)):
+class Part(object, metaclass=PartMeta):
 
     header_struct = struct.Struct('<bbhiii')  # 16 bytes
     header_size = header_struct.size
@@ -100,58 +130,75 @@ class Part(with_metaclass(PartMeta, object)):
 
     def pack(self, remaining_size):
         """Pack data of part into binary format"""
-        arguments_count, payload = self.pack_data(remaining_size - self.header_size)
-        payload_length = len(payload)
+        payload = io.BytesIO()
+        self.pack_into(payload, remaining_size)
+        return payload.getvalue()
+
+    def pack_into(self, payload, remaining_size):
+        """Write the packed part to payload (an io.BytesIO instance), without concatenating header and data first
+        :returns: number of bytes written
+        """
+        arguments_count, data = self.pack_data(remaining_size - self.header_size)
+        payload_length = len(data)
 
         # align payload length to multiple of 8
-        if payload_length % 8 != 0:
-            payload += b"\x00" * (8 - payload_length % 8)
+        padding = PADDING[:-payload_length & 7]
 
         self.header = PartHeader(self.kind, self.attribute, arguments_count, self.bigargumentcount,
                                  payload_length, remaining_size)
         hdr = self.header_struct.pack(*self.header)
+        payload.write(hdr)
+        payload.write(data)
+        payload.write(padding)
         if pyhdb.tracing:
             self.trace_header = humanhexlify(hdr, 30)
-            self.trace_payload = humanhexlify(payload, 30)
-        return hdr + payload
+            self.trace_payload = humanhexlify(data[:30] + padding, 30)
+        return self.header_size + payload_length + len(padding)
 
     def pack_data(self, remaining_size):
         raise NotImplemented()
 
     @classmethod
-    def unpack_from(cls, payload, expected_parts):
-        """Unpack parts from payload"""
-
-        for num_part in iter_range(expected_parts):
-            hdr = payload.read(cls.header_size)
+    def unpack_from(cls, buffer, expected_parts, offset=0):
+        """Unpack parts from buffer
+        :param buffer: bytes, bytearray or memoryview containing the parts
+        :param offset: position of the first part header in buffer
+        """
+        for num_part in range(expected_parts):
             try:
-                part_header = PartHeader(*cls.header_struct.unpack(hdr))
+                part_header = PartHeader(*cls.header_struct.unpack_from(buffer, offset))
             except struct.error:
                 raise InterfaceError("No valid part header")
+            hdr_offset = offset
+            offset += cls.header_size
 
-            if part_header.payload_size % 8 != 0:
-                part_payload_size = part_header.payload_size + 8 - (part_header.payload_size % 8)
-            else:
-                part_payload_size = part_header.payload_size
-            pl = payload.read(part_payload_size)
+            # Payloads are aligned to multiples of 8 bytes
+            part_payload_size = (part_header.payload_size + 7) & ~7
+            pl = buffer[offset:offset + part_payload_size]
+            offset += part_payload_size
             part_payload = io.BytesIO(pl)
             try:
                 _PartClass = PART_MAPPING[part_header.part_kind]
             except KeyError:
                 raise InterfaceError("Unknown part kind %s" % part_header.part_kind)
 
-            debug('%s (%d/%d): %s', _PartClass.__name__, num_part+1, expected_parts, str(part_header))
-            debug('Read %d bytes payload for part %d', part_payload_size, num_part + 1)
+            # Checked once per part, so that the arguments aren't even prepared on production systems
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                debug('%s (%d/%d): %s', _PartClass.__name__, num_part+1, expected_parts, part_header)
+                debug('Read %d bytes payload for part %d', part_payload_size, num_part + 1)
 
             init_arguments = _PartClass.unpack_data(part_header.argument_count, part_payload)
-            debug('Part data: %s', init_arguments)
+            if debug_enabled:
+                debug('Part data: %s', init_arguments)
             part = _PartClass(*init_arguments)
             part.header = part_header
             part.attribute = part_header.part_attributes
             part.source = 'server'
             if pyhdb.tracing:
+                hdr = bytes(buffer[hdr_offset:hdr_offset + cls.header_size])
                 part.trace_header = humanhexlify(hdr[:part_header.payload_size])
-                part.trace_payload = humanhexlify(pl, 30)
+                part.trace_payload = humanhexlify(bytes(pl), 30)
             yield part
 
 
@@ -177,6 +224,16 @@ class Command(Part):
         return sql_statement.decode('cesu-8')
 
 
+@lru_cache(maxsize=128)
+def fixed_width_row_struct(column_types):
+    """Return a struct decoding complete rows of given column types,
+    None if any column can have different widths (e.g. nulls of integers are sent as a single byte)
+    """
+    if not column_types or any(typ.resultset_format is None for typ in column_types):
+        return None
+    return struct.Struct('<' + ''.join(typ.resultset_format for typ in column_types))
+
+
 class ResultSet(Part):
     """
     This part contains the raw result data but without
@@ -201,8 +258,31 @@ class ResultSet(Part):
         :param connection: a db connection object
         :returns: a generator object
         """
-        for _ in iter_range(self.num_rows):
-            yield tuple(typ.from_resultset(self.payload, connection) for typ in column_types)
+        row_struct = fixed_width_row_struct(tuple(column_types))
+        if row_struct is not None:
+            return self._unpack_fixed_width_rows(row_struct)
+        return self._unpack_rows(column_types, connection)
+
+    def _unpack_fixed_width_rows(self, row_struct):
+        """Decode each row of REAL and DOUBLE columns with a single struct call"""
+        size = row_struct.size * self.num_rows
+        data = self.payload.read(size)
+        for offset in range(0, size, row_struct.size):
+            # Nulls are sent as NaN, which HANA can't store otherwise
+            yield tuple([None if value != value else value for value in row_struct.unpack_from(data, offset)])
+
+    def _unpack_rows(self, column_types, connection):
+        # Look up the decoders once per part instead of once per value
+        decoders = tuple(typ.from_resultset for typ in column_types)
+        payload = self.payload
+        if len(decoders) == 1:
+            # e.g. SELECT COUNT(*), build the row tuple without a list comprehension
+            decode, = decoders
+            for _ in range(self.num_rows):
+                yield (decode(payload, connection),)
+            return
+        for _ in range(self.num_rows):
+            yield tuple([decode(payload, connection) for decode in decoders])
 
 
 class OutputParameters(Part):
@@ -247,7 +327,7 @@ class Error(Part):
     @classmethod
     def unpack_data(cls, argument_count, payload):
         errors = []
-        for _ in iter_range(argument_count):
+        for _ in range(argument_count):
             code, position, textlength, level, sqlstate = cls.part_struct.unpack(payload.read(cls.part_struct.size))
             errortext = payload.read(textlength).decode('utf-8')
             if code == 301:
@@ -286,7 +366,7 @@ class RowsAffected(Part):
     @classmethod
     def unpack_data(cls, argument_count, payload):
         values = []
-        for _ in iter_range(argument_count):
+        for _ in range(argument_count):
             values.append(struct.unpack("<i", payload.read(4))[0])
         return tuple(values),
 
@@ -439,9 +519,9 @@ class LobBuffer(object):
     def __init__(self, orig_data, DataType, lob_header_pos):
         self.orig_data = orig_data
         # Lob data can be either an instance of a Lob-class, or a string/unicode object, Encode properly:
-        if isinstance(orig_data, byte_type):
+        if isinstance(orig_data, bytes):
             enc_data = orig_data
-        elif isinstance(orig_data, string_types):
+        elif isinstance(orig_data, str):
             enc_data = DataType.encode_value(orig_data)
         else:
             # assume a LOB instance:
@@ -466,9 +546,10 @@ class Parameters(Part):
 
     def __init__(self, parameters):
         """Initialize parameter part
-        :param parameters: A generator producing lists (1 per row) of named tuples containing parameter meta
-                          data and values (usually an instance of class 'cursor.PreparedStatement')
-               Example: [Parameter(id=0, datatype=9, length=255, value='row2'), Parameter(id=1, ...), ]
+        :param parameters: A generator producing lists (1 per row) of (id, type_code, length, value) tuples
+                          containing parameter meta data and values (usually an instance of class
+                          'cursor.PreparedStatement')
+               Example: [(0, 9, 255, 'row2'), (1, ...), ]
         :returns: tuple (arguments_count, payload)
         """
         self.parameters = parameters
@@ -486,9 +567,7 @@ class Parameters(Part):
             row_lobs = []
             row_lob_size_sum = 0
 
-            for parameter in row_parameters:
-                # 'parameter' is a named tuple, created in PreparedStatement.prepare_parameters()
-                type_code, value = parameter.type_code, parameter.value
+            for _, type_code, _, value in row_parameters:
                 try:
                     _DataType = types.by_type_code[type_code]
                 except KeyError:
@@ -501,7 +580,7 @@ class Parameters(Part):
                 else:
                     pfield = _DataType.prepare(value)
 
-                if type_code in (types.BlobType.type_code, types.ClobType.type_code, types.NClobType.type_code):
+                if type_code in LOB_TYPE_CODES:
                     # In case of value being a lob its actual data is not yet included in 'pfield' generated above.
                     # Instead the lob data needs to be appended at the end of the packed row data.
                     # Memorize the position of the lob header data (the 'pfield'):
@@ -651,6 +730,8 @@ class ParameterMetadata(Part):
 
     kind = constants.part_kinds.PARAMETERMETADATA
     __tracing_attrs__ = Part.__tracing_attrs__ + ['values']
+    part_struct = struct.Struct('bbbbIhhI')
+    ParamMetadataTuple = namedtuple('ParameterMetadata', 'mode datatype iotype id length fraction')
 
     def __init__(self, values):
         self.values = values
@@ -658,13 +739,11 @@ class ParameterMetadata(Part):
     @classmethod
     def unpack_data(cls, argument_count, payload):
         values = []
-        param_md_tuple = namedtuple('ParameterMetadata', 'mode datatype iotype id length fraction')
-        text_offset = 16 * argument_count
+        text_offset = cls.part_struct.size * argument_count
         # read parameter metadata
-        for i in iter_range(argument_count):
+        for i in range(argument_count):
             mode, datatype, iotype, filler1, name_offset, length, fraction, filler2 = \
-                struct.unpack("bbbbIhhI", payload.read(16))
-            param_metadata = param_md_tuple(mode, datatype, iotype, name_offset, length, fraction)
+                cls.part_struct.unpack(payload.read(cls.part_struct.size))
             if name_offset == 0xffffffff:
                 # param id is parameter position
                 param_id = i
@@ -672,10 +751,10 @@ class ParameterMetadata(Part):
                 # read parameter name
                 current_pos = payload.tell()
                 payload.seek(text_offset + name_offset)
-                length = ord(payload.read(1))
-                param_id = payload.read(length).decode('utf-8')
+                name_length = ord(payload.read(1))
+                param_id = payload.read(name_length).decode('utf-8')
                 payload.seek(current_pos)
-            values.append(param_md_tuple(mode, datatype, iotype, param_id, length, fraction))
+            values.append(cls.ParamMetadataTuple(mode, datatype, iotype, param_id, length, fraction))
         return tuple(values),
 
 
@@ -690,13 +769,13 @@ class ResultSetMetaData(Part):
     @classmethod
     def unpack_data(cls, argument_count, payload):
         columns = []
-        for _ in iter_range(argument_count):
+        for _ in range(argument_count):
             meta = list(struct.unpack('bbhhhIIII', payload.read(24)))
             columns.append(meta)
 
         content_start = payload.tell()
         for column in columns:
-            for i in iter_range(5, 9):
+            for i in range(5, 9):
                 if column[i] == 4294967295:
                     column[i] = None
                     continue
@@ -722,14 +801,12 @@ class OptionPartMeta(PartMeta):
         return part_class
 
 
-class OptionPart(with_metaclass(OptionPartMeta, Part)):
+class OptionPart(Part, metaclass=OptionPartMeta):
     """
     The multi-line option part format is a common format to
     transmit collections of options (typed key-value pairs).
     """
 
-    __metaclass__ = OptionPartMeta
-
     def __init__(self, options):
         self.options = options
 
@@ -768,7 +845,7 @@ class OptionPart(with_metaclass(OptionPartMeta, Part)):
     @classmethod
     def unpack_data(cls, argument_count, payload):
         options = {}
-        for _ in iter_range(argument_count):
+        for _ in range(argument_count):
             key, typ = struct.unpack('bb', payload.read(2))
 
             if key not in cls.option_identifier:
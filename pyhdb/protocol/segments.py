@@ -15,10 +15,8 @@
 import io
 import struct
 import logging
-from io import BytesIO
 ###
 from pyhdb.protocol.constants import part_kinds
-from pyhdb.compat import iter_range
 from pyhdb.protocol import constants
 from pyhdb.protocol.parts import Part
 from pyhdb.protocol.headers import RequestSegmentHeader, ReplySegmentHeader
@@ -77,9 +75,7 @@ class RequestSegment(BaseSegment):
         remaining_size = self.MAX_SEGMENT_PAYLOAD_SIZE
 
         for part in self.parts:
-            part_payload = part.pack(remaining_size)
-            payload.write(part_payload)
-            remaining_size -= len(part_payload)
+            remaining_size -= part.pack_into(payload, remaining_size)
 
     def pack(self, payload, **kwargs):
 
@@ -118,28 +114,35 @@ class ReplySegment(BaseSegment):
         self.function_code = function_code
 
     @classmethod
-    def unpack_from(cls, payload, expected_segments):
-
-        for num_segment in iter_range(expected_segments):
+    def unpack_from(cls, buffer, expected_segments, offset=0):
+        """Unpack segments from buffer
+        :param buffer: bytes, bytearray or memoryview containing the segments, parts are parsed in place
+        :param offset: position of the first segment header in buffer
+        """
+        for num_segment in range(expected_segments):
             try:
-                segment_header = ReplySegmentHeader(*cls.header_struct.unpack(payload.read(cls.header_size)))
+                segment_header = ReplySegmentHeader(*cls.header_struct.unpack_from(buffer, offset))
             except struct.error:
                 raise Exception("No valid segment header")
+            offset += cls.header_size
 
-            debug('%s (%d/%d): %s', cls.__name__, num_segment + 1, expected_segments, str(segment_header))
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                debug('%s (%d/%d): %s', cls.__name__, num_segment + 1, expected_segments, segment_header)
             if expected_segments == 1:
                 # If we just expects one segment than we can take the full payload.
                 # This also a workaround of an internal bug (Which bug?)
-                segment_payload_size = -1
+                segment_end = len(buffer)
             else:
-                segment_payload_size = segment_header.segment_length - cls.header_size
+                segment_end = offset + segment_header.segment_length - cls.header_size
 
             # Determinate segment payload
-            pl = payload.read(segment_payload_size)
-            segment_payload = BytesIO(pl)
-            debug('Read %d bytes payload segment %d', len(pl), num_segment + 1)
+            segment_payload = buffer[:segment_end]
+            if debug_enabled:
+                debug('Read %d bytes payload segment %d', len(segment_payload) - offset, num_segment + 1)
 
-            parts = tuple(Part.unpack_from(segment_payload, expected_parts=segment_header.num_parts))
+            parts = tuple(Part.unpack_from(segment_payload, expected_parts=segment_header.num_parts, offset=offset))
+            offset = segment_end
             segment = cls(segment_header.function_code, parts, header=segment_header)
 
             if segment_header.segment_kind == segment_kinds.REPLY:
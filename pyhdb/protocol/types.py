@@ -24,8 +24,6 @@ from weakref import WeakValueDictionary
 
 from pyhdb.protocol.constants import type_codes
 from pyhdb.exceptions import InterfaceError
-from pyhdb.compat import PY26, PY2, PY3, with_metaclass, iter_range, int_types, \
-    string_types, byte_type, text_type
 from pyhdb.protocol.headers import WriteLobHeader
 
 
@@ -76,8 +74,11 @@ class TypeMeta(type):
         return type_class
 
 
-class Type(with_metaclass(TypeMeta, object)):
+class Type(object, metaclass=TypeMeta):
     """Base class for all types"""
+    # struct format of types whose values and nulls have the same fixed width in result sets,
+    # see pyhdb.protocol.parts.ResultSet.unpack_rows()
+    resultset_format = None
 
 
 class NoneType(Type):
@@ -86,7 +87,7 @@ class NoneType(Type):
 
     @classmethod
     def to_sql(cls, _):
-        return text_type("NULL")
+        return str("NULL")
 
     @classmethod
     def prepare(cls, type_code):
@@ -131,12 +132,12 @@ class SmallInt(_IntType):
 class Int(_IntType):
 
     type_code = type_codes.INT
-    python_type = int_types
+    python_type = (int,)
     _struct = struct.Struct("i")
 
     @classmethod
     def to_sql(cls, value):
-        return text_type(value)
+        return str(value)
 
 
 class BigInt(_IntType):
@@ -164,7 +165,7 @@ class Decimal(Type):
         mantissa = (payload[1] & 0x01) << 112
 
         x = 104
-        for i in iter_range(2, 16):
+        for i in range(2, 16):
             mantissa = mantissa | ((payload[i]) << x)
             x -= 8
 
@@ -173,7 +174,7 @@ class Decimal(Type):
 
     @classmethod
     def to_sql(cls, value):
-        return text_type(value)
+        return str(value)
 
     @classmethod
     def prepare(cls, value):
@@ -194,7 +195,7 @@ class Decimal(Type):
         packed[1] = ((exponent & 0x7F) << 1) | (mantissa >> 112)
 
         shift = 104
-        for i in iter_range(2, 16):
+        for i in range(2, 16):
             packed[i] = (mantissa >> shift) & 0xFF
             shift -= 8
 
@@ -206,6 +207,7 @@ class Real(Type):
 
     type_code = type_codes.REAL
     _struct = struct.Struct("<f")
+    resultset_format = "f"  # null is sent as NaN
 
     @classmethod
     def from_resultset(cls, payload, connection=None):
@@ -216,7 +218,7 @@ class Real(Type):
 
     @classmethod
     def to_sql(cls, value):
-        return text_type(value)
+        return str(value)
 
     @classmethod
     def prepare(cls, value):
@@ -233,6 +235,7 @@ class Double(Type):
     type_code = type_codes.DOUBLE
     python_type = float
     _struct = struct.Struct("<d")
+    resultset_format = "d"
 
     @classmethod
     def from_resultset(cls, payload, connection=None):
@@ -243,7 +246,7 @@ class Double(Type):
 
     @classmethod
     def to_sql(cls, value):
-        return text_type(value)
+        return str(value)
 
     @classmethod
     def prepare(cls, value):
@@ -286,9 +289,9 @@ class MixinStringType(object):
             # length indicator
             pfield += struct.pack('B', 255)
         else:
-            if not isinstance(value, string_types):
+            if not isinstance(value, str):
                 # Value is provided e.g. as integer, but a string is actually required. Try proper casting into string:
-                value = text_type(value)
+                value = str(value)
             value = value.encode('cesu-8')
             length = len(value)
             # length indicator
@@ -308,7 +311,7 @@ class String(Type, MixinStringType):
 
     type_code = (type_codes.CHAR, type_codes.VARCHAR, type_codes.NCHAR, type_codes.NVARCHAR,
                  type_codes.STRING, type_codes.NSTRING)
-    python_type = string_types
+    python_type = (str,)
 
     ESCAPE_REGEX = re.compile(r"[\']")
     ESCAPE_MAP = {"'": "''"}
@@ -324,23 +327,18 @@ class String(Type, MixinStringType):
 class Binary(Type, MixinStringType):
 
     type_code = (type_codes.BINARY, type_codes.VARBINARY, type_codes.BSTRING)
-    python_type = byte_type
+    python_type = bytes
 
     @classmethod
     def from_resultset(cls, payload, connection=None):
         length = MixinStringType.get_length(payload)
         if length is None:
             return None
-        return byte_type(payload.read(length))
+        return bytes(payload.read(length))
 
     @classmethod
     def to_sql(cls, value):
-        if PY26:
-            value = bytes(value)
-        value = binascii.hexlify(value)
-        if PY3:
-            value = value.decode('ascii')
-        return "'%s'" % value
+        return "'%s'" % binascii.hexlify(value).decode('ascii')
 
 
 class Date(Type):
@@ -368,7 +366,7 @@ class Date(Type):
     def prepare(cls, value):
         """Pack datetime value into proper binary format"""
         pfield = struct.pack('b', cls.type_code)
-        if isinstance(value, string_types):
+        if isinstance(value, str):
             value = datetime.datetime.strptime(value, "%Y-%m-%d")
         year = value.year | 0x8000  # for some unknown reasons year has to be bit-or'ed with 0x8000
         month = value.month - 1     # for some unknown reasons HANA counts months starting from zero
@@ -439,7 +437,7 @@ class Time(Type):
     def prepare(cls, value):
         """Pack time value into proper binary format"""
         pfield = struct.pack('b', cls.type_code)
-        if isinstance(value, string_types):
+        if isinstance(value, str):
             if "." in value:
                 value = datetime.datetime.strptime(value, "%H:%M:%S.%f")
             else:
@@ -474,7 +472,7 @@ class Timestamp(Type):
     def prepare(cls, value):
         """Pack datetime value into proper binary format"""
         pfield = struct.pack('b', cls.type_code)
-        if isinstance(value, string_types):
+        if isinstance(value, str):
             if "." in value:
                 value = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
             else:
@@ -517,7 +515,7 @@ class ClobType(Type, MixinLobType):
     @classmethod
     def encode_value(cls, value):
         """Return value if it is a string, otherwise properly encode unicode to binary ascii string"""
-        return value.encode('ascii') if isinstance(value, string_types) else value
+        return value.encode('ascii') if isinstance(value, str) else value
 
 
 class NClobType(Type, MixinLobType):
@@ -527,7 +525,7 @@ class NClobType(Type, MixinLobType):
     @classmethod
     def encode_value(cls, value):
         """Return value if it is a string, otherwise properly encode unicode to binary unicode string"""
-        return value.encode('utf8') if isinstance(value, text_type) else value
+        return value.encode('utf8') if isinstance(value, str) else value
 
 
 class BlobType(Type, MixinLobType):
@@ -537,7 +535,7 @@ class BlobType(Type, MixinLobType):
     @classmethod
     def encode_value(cls, value):
         """Return value if it is a string, otherwise properly encode unicode to binary unicode string"""
-        return value.encode('utf8') if isinstance(value, text_type) else value
+        return value.encode('utf8') if isinstance(value, str) else value
 
 class Geometry(Type, MixinStringType):
     """Geometry type class"""
@@ -549,7 +547,7 @@ class Geometry(Type, MixinStringType):
 
     @classmethod
     def to_sql(cls, value):
-        return text_type(value)
+        return str(value)
 
 
 def escape(value):
@@ -557,16 +555,16 @@ def escape(value):
     Escape a single value.
     """
 
+    # Scalar values are by far the most common, so look them up first
+    typ = by_python_type.get(value.__class__)
+    if typ is not None:
+        return typ.to_sql(value)
+
     if isinstance(value, (tuple, list)):
         return "(" + ", ".join([escape(arg) for arg in value]) + ")"
-    else:
-        typ = by_python_type.get(value.__class__)
-        if typ is None:
-            raise InterfaceError(
-                "Unsupported python input: %s (%s)" % (value, value.__class__)
-            )
-
-        return typ.to_sql(value)
+    raise InterfaceError(
+        "Unsupported python input: %s (%s)" % (value, value.__class__)
+    )
 
 
 def escape_values(values):
@@ -576,8 +574,6 @@ def escape_values(values):
     if isinstance(values, (tuple, list)):
         return tuple([escape(value) for value in values])
     elif isinstance(values, dict):
-        return dict([
-            (key, escape(value)) for (key, value) in values.items()
-        ])
+        return {key: escape(value) for key, value in values.items()}
     else:
         raise InterfaceError("escape_values expects list, tuple or dict")
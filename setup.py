@@ -40,12 +40,12 @@ setup(
     long_description=get_long_description(),
     packages=find_packages(exclude=("tests", "tests.*",)),
     zip_safe=False,
+    python_requires='>=3.3',
     classifiers=[  # http://pypi.python.org/pypi?%3Aaction=list_classifiers
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: Apache Software License',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3.3',
         'Programming Language :: Python :: 3.4',
         'Programming Language :: Python :: 3.5',
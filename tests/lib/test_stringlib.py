@@ -37,3 +37,8 @@ def test_dehexlify():
     """Test reverting of humanhexlify"""
     b = '61 62 04 63 65'
     assert dehexlify(b) == b'ab\x04ce'
+
+
+def test_dehexlify_humanhexlify_round_trip():
+    b = b'ab\x04ce\xff'
+    assert dehexlify(humanhexlify(b)) == b
@@ -30,6 +30,18 @@ def test_unpack_data():
     assert unpacked == [b"Hello", b"World"]
 
 
+def test_unpack_from():
+    packed = b"\x00\x02\x00\x05\x48\x65\x6c\x6c\x6f\x05\x57\x6f\x72\x6c\x64"
+    unpacked = Fields.unpack_from(packed, 1)
+    assert unpacked == [b"Hello", b"World"]
+
+
+def test_unpack_large_data_from():
+    fields = [b"a" * 300, b"b" * 200]
+    assert Fields.unpack_from(Fields.pack_data(fields[:1]) + b"trailing") == fields[:1]
+    assert Fields.unpack_from(b"\x01\x00\xc8" + fields[1]) == fields[1:]
+
+
 def test_pack_large_data():
     packed = Fields.pack_data([
         b"97f0f004be65439846e0eae3e67edacbaa6e578d1e8ba1e3d2f57e18460967d1"
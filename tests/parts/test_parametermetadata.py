@@ -0,0 +1,31 @@
+# Copyright 2014, 2015 SAP SE.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http: //www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import struct
+from io import BytesIO
+from pyhdb.protocol.parts import ParameterMetadata
+
+
+def test_unpack_positional_and_named_parameters():
+    payload = BytesIO(
+        struct.pack("bbbbIhhI", 2, 3, 1, 0, 0xffffffff, 10, 0, 0) +
+        struct.pack("bbbbIhhI", 2, 9, 1, 0, 0, 32, 0, 0) +
+        b"\x04NAME"
+    )
+    values, = ParameterMetadata.unpack_data(2, payload)
+
+    assert values[0] == (2, 3, 1, 0, 10, 0)
+    assert values[1].id == u"NAME"
+    assert values[1].datatype == 9
+    assert values[1].length == 32
@@ -0,0 +1,63 @@
+# Copyright 2014, 2015 SAP SE.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http: //www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+from io import BytesIO
+from pyhdb.protocol.parts import ResultSet, fixed_width_row_struct
+from pyhdb.protocol.types import Int, String, Real, Double
+
+
+def test_unpack_rows():
+    payload = BytesIO(
+        b"\x01\x01\x00\x00\x00" b"\x03foo" b"\x00\x00\x00\x00\x00\x00\xf0\x3f"
+        b"\x00" b"\xff" b"\xff\xff\xff\xff\xff\xff\xff\xff"
+    )
+    part = ResultSet(payload, 2)
+
+    rows = list(part.unpack_rows((Int, String, Double), None))
+    assert rows == [(1, u"foo", 1.0), (None, None, None)]
+
+
+def test_unpack_rows_is_lazy():
+    part = ResultSet(BytesIO(b"\x01a\x01b"), 2)
+
+    rows = part.unpack_rows((String,), None)
+    assert next(rows) == (u"a",)
+    assert part.payload.tell() == 2
+    assert next(rows) == (u"b",)
+
+
+def test_fixed_width_row_struct():
+    row_struct = fixed_width_row_struct((Double, Real))
+    assert row_struct.format in ('<df', b'<df')
+
+    # Null integers are sent as a single byte
+    assert fixed_width_row_struct((Double, Int)) is None
+    assert fixed_width_row_struct(()) is None
+
+
+def test_unpack_fixed_width_rows():
+    payload = BytesIO(
+        b"\x00\x00\x00\x00\x00\x00\xf0\x3f" b"\x00\x00\x80\x3f"
+        b"\xff\xff\xff\xff\xff\xff\xff\xff" b"\xff\xff\xff\xff"
+        b"\x00\x00\x00\x00\x00\x00\x00\x00" b"\x00\x00\x00\xc0"
+    )
+    column_types = (Double, Real)
+    part = ResultSet(payload, 3)
+
+    rows = list(part.unpack_rows(column_types, None))
+    assert rows == [(1.0, 1.0), (None, None), (0.0, -2.0)]
+
+    # Same result as decoding value by value
+    payload.seek(0)
+    assert list(ResultSet(payload, 3)._unpack_rows(column_types, None)) == rows
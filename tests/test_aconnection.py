@@ -0,0 +1,61 @@
+# Copyright 2014, 2015 SAP SE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import socket
+import pytest
+###
+from pyhdb.exceptions import Error
+from pyhdb.protocol.message import RequestMessage, ReplyMessage
+from pyhdb.protocol.segments import RequestSegment
+from pyhdb.protocol.constants import message_types
+
+if sys.version_info >= (3, 7):
+    import asyncio
+    from pyhdb.aconnection import AsyncConnection
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 7), reason="AsyncConnection requires Python 3.7+")
+
+
+@pytest.fixture
+def socket_pair():
+    client, server = socket.socketpair()
+    client.setblocking(False)
+    yield client, server
+    client.close()
+    server.close()
+
+
+def test_send_request(socket_pair):
+    client, server = socket_pair
+    payload = bytes(range(100))
+    server.sendall(ReplyMessage.header_struct.pack(1, 0, len(payload), len(payload), 0, 0) + payload)
+
+    connection = AsyncConnection("localhost", 30015, "Fuu", "Bar")
+    connection._socket = client
+    connection._socket_lock = asyncio.Lock()
+    request = RequestMessage.new(connection, RequestSegment(message_types.COMMIT))
+    reply = asyncio.run(connection.send_request(request))
+
+    assert reply.header.payload_length == 100
+    assert connection.session_id == 1
+    assert server.recv(1024) == request.pack().getvalue()
+
+
+def test_send_request_on_closed_connection():
+    connection = AsyncConnection("localhost", 30015, "Fuu", "Bar")
+    request = RequestMessage.new(connection, RequestSegment(message_types.COMMIT))
+
+    with pytest.raises(Error):
+        asyncio.run(connection.send_request(request))
@@ -63,3 +63,24 @@ class TestSCRAMSHA256(object):
             b"\x00\x01\x20\xe4\x7d\x8f\x24\x48\x55\xb9\x2d\xc9\x66\x39\x5d" \
             b"\x0d\x28\x25\x47\xb5\x4d\xfd\x09\x61\x4d\x44\x37\x4d\xf9\x4f" \
             b"\x29\x3c\x1a\x02\x0e"
+
+    @pytest.mark.parametrize("a,b,expected", [
+        (b"\x00\x00", b"\x00\x00", b"\x00\x00"),
+        (b"\x00\xff\x0f", b"\x00\x0f\xff", b"\x00\xf0\xf0"),
+        (b"\xaa" * 32, b"\x55" * 32, b"\xff" * 32),
+    ])
+    def test_xor(self, a, b, expected):
+        assert AuthManager._xor(a, b) == expected
+
+    def test_derived_keys_are_kept_per_auth_manager(self, auth_manager):
+        salt = b"\x80\x96\x4f\xa8\x54\x28\xae\x3a\x81\xac" \
+               b"\xd3\xe6\x86\xa2\x79\x33"
+        server_key = b"\x00" * 48
+
+        proof = auth_manager.calculate_client_proof([salt], server_key)
+        assert list(auth_manager._derived_keys) == [salt]
+        # Reusing the derived keys gives the same proof
+        assert auth_manager.calculate_client_proof([salt], server_key) == proof
+
+        # Nothing is shared with other connections
+        assert AuthManager(None, "TestUser", "secret")._derived_keys == {}
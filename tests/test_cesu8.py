@@ -90,3 +90,9 @@ def test_cesu8_and_utf8_mixed_encode_decode():
     cesu8_encoded = unicode_input.encode('cesu-8')
     decoded_unicode = cesu8_encoded.decode('cesu-8')
     assert decoded_unicode == unicode_input
+
+
+@pytest.mark.parametrize("name", ['cesu-8', 'cesu_8', 'CESU-8'])
+def test_codec_lookup(name):
+    import codecs
+    assert codecs.lookup(name) is pyhdb.cesu8.CESU8_CODEC_INFO
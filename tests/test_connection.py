@@ -15,12 +15,38 @@
 # Test additional features of pyhdb.Connection
 
 import os
+import sys
+import socket
 import pytest
+import mock
 
-from pyhdb.connection import Connection
+from pyhdb.connection import Connection, pack_control_request, DEFAULT_SOCKET_OPTIONS, KEEPALIVE_SOCKET_OPTIONS
+from pyhdb.protocol.message import RequestMessage, ReplyMessage
+from pyhdb.protocol.segments import RequestSegment, ReplySegment
+from pyhdb.protocol.parts import Part, StatementId
+from pyhdb.protocol.constants import message_types, segment_kinds
 import pyhdb
 
 
+class ChunkedSocket(object):
+    """Fake socket which delivers the prepared reply data in small chunks"""
+    def __init__(self, data, chunk_size):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    def sendall(self, data):
+        pass
+
+    def recv(self, size):
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+    def recv_into(self, buffer, nbytes=0, flags=0):
+        chunk = self.recv(min(nbytes or len(buffer), len(buffer), self.chunk_size))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
 @pytest.mark.hanatest
 def test_initial_timeout(connection):
     assert connection.timeout is None
@@ -59,7 +85,200 @@ def test_set_timeout_without_socket():
     assert connection.timeout == 10
 
 
+def test_socket_options_applied_before_connect():
+    connection = Connection("localhost", 30015, "Fuu", "Bar",
+                            socket_options=[(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)])
+    address_info = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 30015))]
+    with mock.patch('socket.getaddrinfo', return_value=address_info), \
+            mock.patch('socket.socket') as socket_class:
+        sock = socket_class.return_value
+        sock.recv_into.side_effect = ChunkedSocket(b"\x04\x14\x00\x04\x01\x00\x00\x00", 8).recv_into
+        connection._open_socket_and_init_protocoll()
+
+    assert sock.method_calls[:3] == [
+        mock.call.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20),
+        mock.call.settimeout(None),
+        mock.call.connect(('127.0.0.1', 30015)),
+    ]
+
+
+def test_ssl_context_wraps_socket_after_connect():
+    ssl_context = mock.Mock()
+    connection = Connection("localhost", 30015, "Fuu", "Bar", ssl_context=ssl_context)
+    address_info = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 30015))]
+    ssl_socket = ssl_context.wrap_socket.return_value
+    ssl_socket.recv_into.side_effect = ChunkedSocket(b"\x04\x14\x00\x04\x01\x00\x00\x00", 8).recv_into
+    with mock.patch('socket.getaddrinfo', return_value=address_info), \
+            mock.patch('socket.socket') as socket_class:
+        connection._open_socket_and_init_protocoll()
+
+    ssl_context.wrap_socket.assert_called_once_with(socket_class.return_value, server_hostname="localhost")
+    assert connection._socket is ssl_socket
+    # SSL sockets reject any recv flags
+    assert ssl_socket.recv_into.call_args[0][2] == 0
+
+
+def test_tcp_nodelay_enabled_by_default():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in connection._socket_options
+
+
+def test_keepalive_enabled_by_default():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in connection._socket_options
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        assert (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60) in KEEPALIVE_SOCKET_OPTIONS
+
+
+def test_default_socket_options_are_accepted():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        for level, option, value in DEFAULT_SOCKET_OPTIONS:
+            sock.setsockopt(level, option, value)
+    finally:
+        sock.close()
+
+
+def test_rejected_keepalive_options_are_skipped():
+    def setsockopt(level, option, value):
+        if (level, option, value) not in DEFAULT_SOCKET_OPTIONS:
+            raise OSError(22, 'Invalid argument')
+
+    sock = mock.Mock()
+    sock.setsockopt.side_effect = setsockopt
+    Connection("localhost", 30015, "Fuu", "Bar")._apply_socket_options(sock)
+    assert sock.setsockopt.call_count == len(DEFAULT_SOCKET_OPTIONS) + len(KEEPALIVE_SOCKET_OPTIONS)
+
+
+def test_keepalive_options_follow_default_options_only():
+    sock = mock.Mock()
+    Connection("localhost", 30015, "Fuu", "Bar", socket_options=[])._apply_socket_options(sock)
+    assert not sock.setsockopt.called
+
+
+def test_connection_uses_slots():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    assert not hasattr(connection, '__dict__')
+    with pytest.raises(AttributeError):
+        connection.unknown_attribute = True
+
+
+def test_packet_count_restarts_with_new_session():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    assert [connection.get_next_packet_count() for _ in range(3)] == [0, 1, 2]
+    assert connection.packet_count == 2
+
+    header = ReplyMessage.header_struct.pack(1, 0, 0, 0, 0, 0)
+    connection._socket = ChunkedSocket(header, 32)
+    connection.send_request(RequestMessage.new(connection, RequestSegment(message_types.DISCONNECT)))
+
+    assert connection.session_id == 1
+    assert connection.get_next_packet_count() == 0
+
+
+@pytest.mark.parametrize("autocommit", [False, True])
+@pytest.mark.parametrize("message_type", [message_types.COMMIT, message_types.ROLLBACK, message_types.DISCONNECT])
+def test_pack_control_request_matches_packed_message(message_type, autocommit):
+    connection = Connection("localhost", 30015, "Fuu", "Bar", autocommit=autocommit)
+    connection.session_id = 1234567890123
+    connection.get_next_packet_count()
+
+    for packet_count in (1, 2):
+        packed = pack_control_request(connection, message_type)
+        message = RequestMessage(connection.session_id, packet_count, RequestSegment(message_type),
+                                 autocommit=autocommit)
+        assert bytes(packed) == message.pack().getvalue()
+        assert connection.packet_count == packet_count
+
+
+def test_send_request_receives_chunked_payload():
+    payload = bytes(bytearray(range(100)))
+    header = ReplyMessage.header_struct.pack(1, 0, len(payload), len(payload), 0, 0)
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    connection._socket = ChunkedSocket(header + payload, 7)
+
+    with mock.patch('pyhdb.connection.ReplyMessage.unpack_reply') as unpack_reply:
+        connection.send_request(RequestMessage.new(connection, RequestSegment(message_types.DISCONNECT)))
+
+    assert unpack_reply.call_args[0][1] == payload
+
+
+def test_init_reply_received_in_chunks():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    sock = ChunkedSocket(b"\x01\x02\x00\x04\x05\x00\x00\x00", 3)
+    with mock.patch.object(Connection, '_create_socket', return_value=sock):
+        connection._open_socket_and_init_protocoll()
+
+    assert connection.product_version == (1, 2)
+    assert connection.protocol_version == (4, 5)
+
+
+def _statement_id_reply(statement_id):
+    part = Part.header_struct.pack(StatementId.kind, 0, 1, 0, 8, 0) + statement_id
+    segment = ReplySegment.header_struct.pack(ReplySegment.header_size + len(part), 0, 1, 1, segment_kinds.REPLY, 0)
+    payload = segment + part
+    return ReplyMessage.header_struct.pack(1, 0, len(payload), len(payload), 1, 0) + payload
+
+
+def test_replies_dont_share_the_reused_payload_buffer():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    request = RequestMessage.new(connection, RequestSegment(message_types.DISCONNECT))
+    # Only allocated once a reply is received
+    assert connection._payload_view is None
+
+    connection._socket = ChunkedSocket(_statement_id_reply(b"A" * 8) + _statement_id_reply(b"B" * 8), 7)
+    first = connection.send_request(request)
+    second = connection.send_request(request)
+
+    assert first.segments[0].parts[0].statement_id == b"A" * 8
+    assert second.segments[0].parts[0].statement_id == b"B" * 8
+
+
+def test_send_request_with_truncated_header():
+    connection = Connection("localhost", 30015, "Fuu", "Bar")
+    connection._socket = ChunkedSocket(b"\x00" * 10, 7)
+
+    with pytest.raises(Exception) as excinfo:
+        connection.send_request(RequestMessage.new(connection, RequestSegment(message_types.DISCONNECT)))
+    assert "Invalid message header" in str(excinfo.value)
+
+
+def test_client_id_resolves_hostname_once():
+    with mock.patch('pyhdb.connection._fqdn', None), \
+            mock.patch('socket.getfqdn', return_value='example.com') as getfqdn:
+        assert pyhdb.connection.get_client_id() == "pyhdb-%s@example.com" % os.getpid()
+        assert pyhdb.connection.get_client_id() == "pyhdb-%s@example.com" % os.getpid()
+
+    assert getfqdn.call_count == 1
+
+
 def test_make_connection_from_pytest_ini():
     if not os.path.isfile('pytest.ini'):
         pytest.skip("Requires pytest.ini file")
     connection = pyhdb.connect.from_ini('pytest.ini')
+
+
+def test_from_ini_rereads_parameters(tmpdir):
+    ini_file = tmpdir.join('hana.ini')
+    ini_file.write('[hana]\nhana_host = localhost\nhana_port = 30015\nuser = Fuu\npassword = Bar\nhostname = foo\n')
+    from_ini = pyhdb.connect.from_ini
+
+    with mock.patch('pyhdb.connect') as connect:
+        from_ini(str(ini_file))
+        connect.assert_called_with(host='localhost', port='30015', user='Fuu', password='Bar')
+        # Nothing is kept between calls, so changed credentials are picked up
+        ini_file.write('[hana]\nhost = localhost\nport = 30015\nuser = Fuu\npassword = Baz\n')
+        from_ini(str(ini_file))
+        connect.assert_called_with(host='localhost', port='30015', user='Fuu', password='Baz')
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="Requires module level __getattr__ (PEP 562)")
+def test_lazy_module_attributes():
+    for name in pyhdb.__all__:
+        assert name in dir(pyhdb)
+        assert getattr(pyhdb, name) is not None
+    assert len(dir(pyhdb)) == len(set(dir(pyhdb)))
+    assert pyhdb.Connection is Connection
+
+    with pytest.raises(AttributeError):
+        pyhdb.Unknown
@@ -13,10 +13,15 @@
 # language governing permissions and limitations under the License.
 
 import pytest
+import mock
+from io import BytesIO
 from decimal import Decimal
 
-from pyhdb.cursor import format_operation
-from pyhdb.exceptions import ProgrammingError, IntegrityError
+from pyhdb.cursor import Cursor, PreparedStatement, format_operation, sum_rowcounts
+from pyhdb.protocol.parts import ResultSet, Parameters, ParameterMetadata
+from pyhdb.protocol.types import Int, String, Double
+from pyhdb.protocol.constants import type_codes
+from pyhdb.exceptions import ProgrammingError, IntegrityError, DatabaseError
 import tests.helper
 
 TABLE = 'PYHDB_TEST_1'
@@ -80,6 +85,92 @@ def test_format_operation_with_named_parameters():
     ) == "INSERT INTO TEST VALUES('Hello World', 2)"
 
 
+@pytest.mark.parametrize("rowcounts, expected", [
+    ((), 0),
+    ((1,), 1),
+    ((1, 1, 2), 4),
+    ((1, -2, 1), -1),
+])
+def test_sum_rowcounts(rowcounts, expected):
+    assert sum_rowcounts(rowcounts) == expected
+
+
+def test_executemany_without_rows_skips_prepare():
+    connection = mock.Mock(closed=False)
+    cursor = Cursor(connection)
+
+    assert cursor.executemany("INSERT INTO DUMMY VALUES (?)", []) is cursor
+    assert not connection.send_request.called
+
+
+def test_prepared_statement_parameter_rows():
+    params_metadata = (
+        ParameterMetadata.ParamMetadataTuple(2, type_codes.INT, 1, 0, 10, 0),
+        ParameterMetadata.ParamMetadataTuple(2, type_codes.VARCHAR, 1, 1, 255, 0),
+    )
+    statement = PreparedStatement(None, b"\x00" * 8, params_metadata, None)
+
+    parameters = statement.prepare_parameters([(1, u"a"), [None, u"b"]])
+    assert list(parameters) == [
+        [(0, type_codes.INT, 10, 1), (1, type_codes.VARCHAR, 255, u"a")],
+        [(0, type_codes.INT, 10, None), (1, type_codes.VARCHAR, 255, u"b")],
+    ]
+
+    num_rows, payload = Parameters(statement.prepare_parameters([(1, u"a")])).pack_data(1024)
+    assert num_rows == 1
+    assert payload == Int.prepare(1) + String.prepare(u"a", type_codes.VARCHAR)
+
+
+def test_prepared_select_decodes_result_metadata_once():
+    cursor = Cursor(mock.Mock(closed=False))
+    cursor._handle_result_metadata = mock.Mock(return_value=((("ID",),), (Double,)))
+    statement = PreparedStatement(None, b"\x00" * 8, (), mock.Mock())
+
+    cursor._handle_prepared_select([], statement)
+    cursor._handle_prepared_select([], statement)
+
+    cursor._handle_result_metadata.assert_called_once_with(statement.result_metadata_part)
+    assert cursor.description == (("ID",),)
+    assert cursor._column_types == (Double,)
+
+
+def test_fetchone_prefetches_rows():
+    connection = mock.Mock(closed=False)
+    resultset = ResultSet(BytesIO(b"".join(Double._struct.pack(value) for value in (1.0, 2.0, 3.0))), 3)
+    resultset.attribute = 1  # last part
+    connection.send_request.return_value.segments = [mock.Mock(parts=(None, resultset))]
+
+    cursor = Cursor(connection)
+    cursor._executed = True
+    cursor._column_types = (Double,)
+    cursor._resultset_id = b"\x00" * 8
+
+    assert cursor.fetchone() == (1.0,)
+    request = connection.send_request.call_args[0][0]
+    assert request.segments[0].parts[1].size == cursor.prefetchrows
+
+    # Remaining rows are served without further requests
+    assert cursor.fetchmany(5) == [(2.0,), (3.0,)]
+    assert cursor.fetchone() is None
+    assert connection.send_request.call_count == 1
+
+
+def test_executemany_remembers_statements_with_python_expansion():
+    cursor = Cursor(mock.Mock(closed=False))
+    cursor.prepare = mock.Mock(side_effect=DatabaseError('sql syntax error: incorrect syntax near "%"'))
+    cursor._execute_direct = mock.Mock()
+
+    cursor.executemany("SELECT * FROM DUMMY WHERE 1 = %s", [(1,), (2,)])
+    cursor.executemany("SELECT * FROM DUMMY WHERE 1 = %s", [(3,)])
+
+    assert cursor.prepare.call_count == 1
+    assert [c[0][0] for c in cursor._execute_direct.call_args_list] == [
+        "SELECT * FROM DUMMY WHERE 1 = 1",
+        "SELECT * FROM DUMMY WHERE 1 = 2",
+        "SELECT * FROM DUMMY WHERE 1 = 3",
+    ]
+
+
 @pytest.mark.hanatest
 def test_cursor_fetch_without_execution(connection):
     cursor = connection.cursor()
@@ -257,6 +348,7 @@ def test_cursor_executemany_python_expansion(connection, test_table_1):
             ("Statement 2",)
         )
     )
+    assert cursor.rowcount == 2
 
     cursor.execute("SELECT * FROM %s" % TABLE)
     result = cursor.fetchall()
@@ -274,6 +366,7 @@ def test_cursor_executemany_hana_expansion(connection, test_table_1):
             ("Statement 2",)
         )
     )
+    assert cursor.rowcount == 2
 
     cursor.execute("SELECT * FROM %s" % TABLE)
     result = cursor.fetchall()
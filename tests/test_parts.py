@@ -12,8 +12,8 @@
 # either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import io
 import pytest
-from io import BytesIO
 ###
 from pyhdb.protocol.parts import Part, PART_MAPPING
 from pyhdb.exceptions import InterfaceError
@@ -59,8 +59,16 @@ class TestBasePart(object):
         assert len(payload) == 16
         assert payload == b"\x00" * 16
 
+    def test_pack_into_appends_to_payload(self):
+        payload = io.BytesIO()
+        payload.write(b"\xff" * 8)
+
+        written = DummyPart(10).pack_into(payload, 0)
+        assert written == 32
+        assert payload.getvalue() == b"\xff" * 8 + DummyPart(10).pack(0)
+
     def test_unpack_single_dummy_part(self):
-        packed = BytesIO(
+        packed = (
             b'\x7F\x00\x0A\x00\x00\x00\x00\x00\x0A\x00\x00\x00\x00'
             b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
         )
@@ -73,7 +81,7 @@ class TestBasePart(object):
         assert unpacked.zeros == 10
 
     def test_unpack_multiple_dummy_parts(self):
-        packed = BytesIO(
+        packed = (
             b"\x7f\x00\x0a\x00\x00\x00\x00\x00\x0a\x00\x00\x00\xc8\xff\x01"
             b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
             b"\x00\x00\x7f\x00\x0e\x00\x00\x00\x00\x00\x0e\x00\x00\x00\xa8"
@@ -94,15 +102,27 @@ class TestBasePart(object):
         assert isinstance(unpacked[2], DummyPart)
         assert unpacked[2].zeros == 18
 
+    def test_unpack_dummy_part_from_memoryview_offset(self):
+        packed = memoryview(
+            b"\xff" * 8 +
+            b'\x7F\x00\x0A\x00\x00\x00\x00\x00\x0A\x00\x00\x00\x00'
+            b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        )
+
+        unpacked = tuple(Part.unpack_from(packed, 1, offset=8))
+        assert len(unpacked) == 1
+        assert isinstance(unpacked[0], DummyPart)
+        assert unpacked[0].zeros == 10
+
     def test_invalid_part_header_raises_exception(self):
-        packed = BytesIO(
+        packed = (
             b"\xbb\xff\xaa\x00\x00\x00\x00\x0a\x00\x00\x00\x00\x00\x00\x00"
         )
         with pytest.raises(InterfaceError):
             tuple(Part.unpack_from(packed, 1))
 
     def test_unpack_unkown_part_raises_exception(self):
-        packed = BytesIO(
+        packed = (
             b"\x80\x00\x0a\x00\x00\x00\x00\x00\x0a\x00\x00\x00\x00"
             b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
         )
@@ -0,0 +1,167 @@
+# Copyright 2014, 2015 SAP SE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import pytest
+import mock
+
+import pyhdb
+from pyhdb.exceptions import Error
+from pyhdb.pool import ConnectionPool, PoolError
+
+
+class DummyConnection(object):
+
+    def __init__(self, host, port, user, password, autocommit=False, ssl_context=None):
+        self.autocommit = autocommit
+        self.ssl_context = ssl_context
+        self.closed = True
+        self.rollback = mock.Mock()
+
+    def connect(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    with mock.patch('pyhdb.pool.Connection', DummyConnection):
+        yield ConnectionPool(1, 2, "localhost", 30015, "Fuu", "Bar")
+
+
+def test_pool_opens_minconn_connections(pool):
+    assert len(pool._idle) == 1
+    assert not pool._idle[0][0].closed
+
+
+def test_getconn_reuses_returned_connection(pool):
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    conn.rollback.assert_called_once_with()
+
+
+def test_getconn_raises_when_exhausted(pool):
+    pool.getconn()
+    pool.getconn()
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+def test_getconn_skips_closed_connections(pool):
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.close()
+    assert pool.getconn() is not conn
+
+
+def test_acquire_times_out_when_exhausted(pool):
+    pool.getconn()
+    pool.getconn()
+    with pytest.raises(PoolError):
+        pool.acquire(timeout=0.01)
+
+
+def test_acquire_waits_for_released_connection(pool):
+    first, second = pool.getconn(), pool.getconn()
+    timer = threading.Timer(0.05, pool.release, (second,))
+    timer.start()
+    assert pool.acquire(timeout=5) is second
+    timer.join()
+
+
+def test_stale_idle_connection_is_replaced(pool):
+    conn = pool.getconn()
+    pool.putconn(conn)
+    pool.idle_timeout = -1
+    conn.rollback.side_effect = Error("Lost connection")
+
+    assert pool.getconn() is not conn
+    assert conn.closed
+
+
+def test_network_round_trips_happen_outside_of_the_lock(pool):
+    locked = []
+    pool._connect = lambda: locked.append(pool._lock.locked()) or DummyConnection("localhost", 30015, "Fuu", "Bar")
+
+    idle = pool.getconn()
+    pool.getconn()  # connects, the idle connection is already taken
+    idle.rollback.side_effect = lambda: locked.append(pool._lock.locked())
+    pool.putconn(idle)
+    assert locked == [False, False]
+
+
+def test_failed_connect_releases_slot(pool):
+    pool.getconn()
+    pool._connect = mock.Mock(side_effect=Error("Connection refused"))
+    with pytest.raises(Error):
+        pool.getconn()
+
+    del pool._connect
+    with mock.patch('pyhdb.pool.Connection', DummyConnection):
+        assert pool.getconn() is not None
+    assert pool._pending == 0
+
+
+def test_connection_context_manager(pool):
+    with pool.connection() as conn:
+        assert conn in pool._used
+    assert conn not in pool._used
+    assert pool._idle[-1][0] is conn
+
+
+def test_putconn_closes_surplus_connections(pool):
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+    assert not first.closed
+    assert second.closed
+
+
+def test_putconn_rejects_foreign_connection(pool):
+    with pytest.raises(PoolError):
+        pool.putconn(DummyConnection("localhost", 30015, "Fuu", "Bar"))
+
+
+def test_closeall(pool):
+    conn = pool.getconn()
+    pool.closeall()
+    assert conn.closed
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+def test_closeall_closes_without_holding_the_lock(pool):
+    conn = pool.getconn()
+    locked = []
+    conn.close = lambda: locked.append(pool._lock.locked())
+    conn.closed = False
+    pool.closeall()
+    assert locked == [False]
+
+
+def test_pool_passes_ssl_context():
+    ssl_context = object()
+    with mock.patch('pyhdb.pool.Connection', DummyConnection):
+        pool = pyhdb.connect.from_pool(1, 1, "localhost", 30015, "Fuu", "Bar", ssl_context=ssl_context)
+    assert pool._idle[0][0].ssl_context is ssl_context
+
+
+def test_connect_from_pool():
+    with mock.patch('pyhdb.pool.Connection', DummyConnection):
+        pool = pyhdb.connect.from_pool(0, 1, "localhost", 30015, "Fuu", "Bar")
+    assert isinstance(pool, ConnectionPool)
+    assert pool.maxconn == 1
@@ -24,7 +24,6 @@ import mock
 
 from pyhdb.protocol import lobs
 from pyhdb.protocol.types import type_codes
-from pyhdb.compat import PY2, PY3, iter_range, text_type
 from pyhdb.protocol import constants
 
 # #############################################################################################################
@@ -70,7 +69,6 @@ def test_clob_uses_string_io():
 
 
 def test_clob_returns_string_instance():
-    """For PY2 the result value must be a str-instance, not a unicode"""
     data = string.ascii_letters
     clob = lobs.Clob(data)
     assert isinstance(clob.read(), str)
@@ -83,16 +81,6 @@ def test_clob_from_ascii_string():
     assert clob.encode() == data.encode('ascii')
 
 
-def test_clob_from_ascii_unicode():
-    """Feeding unicode string works as long as only contains ascii chars"""
-    if not PY2:
-        pytest.skip('test only makes sense in PY2')
-    data = string.ascii_letters.decode('ascii')
-    clob = lobs.Clob(data)
-    assert clob.getvalue() == data
-    assert clob.encode() == data
-
-
 def test_clob_from_nonascii_unicode_raises():
     """Feeding unicode string with non-ascii chars should raise an exception"""
     data = u'朱の子ましけ'
@@ -100,10 +88,7 @@ def test_clob_from_nonascii_unicode_raises():
         lobs.Clob(data)
 
 def test_clob_from_string_io():
-    if PY2:
-        data = string.ascii_letters.decode('ascii')
-    else:
-        data = string.ascii_letters
+    data = string.ascii_letters
     text_io = lobs.CLOB_STRING_IO(data)
     clob = lobs.Clob(text_io)
     assert clob.getvalue() == data
@@ -117,17 +102,6 @@ def test_clob___str___method():
     assert str(clob) == data
 
 
-def test_clob___unicode___method():
-    """Test that the magic __unicode__ method returns a proper unicode string"""
-    if not PY2:
-        pytest.skip('test only makes sense in PY2')
-
-    data = string.ascii_letters
-    clob = lobs.Clob(data)
-    assert type(unicode(clob)) == unicode
-    assert unicode(clob) == data.decode('ascii')
-
-
 # ### Testing NCLOBs
 
 def test_nclob_uses_string_io():
@@ -177,9 +151,6 @@ def test_nclob___str___method_for_ascii_chars():
 
 def test_nclob__str___method_for_nonascii_chars():
     """Test that the magic __str__ method raise Unicode error for non-ascii chars"""
-    if not PY3:
-        pytest.skip('test only makes sense in PY3')
-
     data = u'朱の子ましけ'
     nclob = lobs.NClob(data)
     uni_nclob = str(nclob)
@@ -187,29 +158,6 @@ def test_nclob__str___method_for_nonascii_chars():
     assert uni_nclob == data
 
 
-def test_nclob__str___method_for_nonascii_chars_raises():
-    """Test that the magic __str__ method raise Unicode error for non-ascii chars"""
-    if not PY2:
-        pytest.skip('test only makes sense in PY2')
-
-    data = u'朱の子ましけ'
-    nclob = lobs.NClob(data)
-    with pytest.raises(UnicodeEncodeError):
-        str(nclob)
-
-
-def test_nclob___unicode___method_for_nonascii_chars():
-    """Test that the magic __unicode__ method returns a proper text_type"""
-    if not PY2:
-        pytest.skip('test only makes sense in PY2')
-
-    data = u'朱の子ましけ'
-    nclob = lobs.NClob(data)
-    uni_nclob = unicode(nclob)
-    assert type(uni_nclob) == text_type
-    assert uni_nclob == data
-
-
 def test_nclob___repr___method():
     data = u'朱の子ましけ'
     nclob = lobs.NClob(data)
@@ -326,11 +274,8 @@ def test_read_lob(type_code, lob_header, bin_lob_data, lob_data, lob_data_empty)
         (_ExpectedLobClass.__name__, lob.length, lob._current_lob_length)
 
 
-def test_read_lob__str__method_python3():
+def test_read_lob__str__method():
     """Read/parse a LOB with given payload (data) and check ___str__ method"""
-    if PY2:
-        pytest.skip("See test_read_lob__str__method_python2")
-
     payload = io.BytesIO(BLOB_HEADER + BLOB_DATA)
     lob = lobs.from_payload(type_codes.BLOB, payload, None)
     len = lob._lob_header.byte_length
@@ -338,17 +283,6 @@ def test_read_lob__str__method_python3():
                                    "%d, locator_id: b'\\x00\\x00\\x00\\x00\\xb2\\xb9\\x04\\x00', chunklength: 1024>" % \
                                    (len, len)
 
-def test_read_lob__str__method_python2():
-    """Read/parse a LOB with given payload (data) and check ___str__ method"""
-    if PY3:
-        pytest.skip("See test_read_lob__str__method_python3")
-
-    payload = io.BytesIO(BLOB_HEADER + BLOB_DATA)
-    lob = lobs.from_payload(type_codes.BLOB, payload, None)
-    len = lob._lob_header.byte_length
-    assert str(lob._lob_header) == "<ReadLobHeader type: 1, options 2 (data_included), charlength: %d, bytelength: " \
-                                   "%d, locator_id: '\\x00\\x00\\x00\\x00\\xb2\\xb9\\x04\\x00', chunklength: 1024>" % \
-                                   (len, len)
 
 @lob_params
 def test_blob_io_functions(type_code, lob_header, bin_lob_data, lob_data, lob_data_empty):
@@ -594,18 +528,12 @@ def test_insert_multiple_clob_and_nclob_rows(connection, test_table):
 
     n_name, n_nclob, n_clob = rows[1]
     assert n_name == 'blob2'
-    if PY2:
-        assert n_nclob.read() == nclob_data2.decode('utf8')
-    else:
-        assert n_nclob.read() == nclob_data2
+    assert n_nclob.read() == nclob_data2
     assert n_clob.read() == clob_data2
 
     n_name, n_nclob, n_clob = rows[2]
     assert n_name == 'blob3'
-    if PY2:
-        assert n_nclob.read() == nclob_data3.decode('utf8')
-    else:
-        assert n_nclob.read() == nclob_data3
+    assert n_nclob.read() == nclob_data3
     assert n_clob.read() == clob_data3
 
 
@@ -633,7 +561,7 @@ def test_insert_two_large_lobs_via_writelob_requests(connection, test_table):
     Check that such a large BLOBs are written correctly.
     """
     bigblob = os.urandom(2 * constants.MAX_SEGMENT_SIZE + 1000)
-    bigclob = ''.join(random.choice(string.ascii_letters) for x in iter_range(2 * constants.MAX_SEGMENT_SIZE))
+    bigclob = ''.join(random.choice(string.ascii_letters) for x in range(2 * constants.MAX_SEGMENT_SIZE))
     cursor = connection.cursor()
     cursor.execute("insert into %s (fblob, name, fclob) values (:1, :2, :3)" % TABLE, [bigblob, 'blob1', bigclob])
     connection.commit()
@@ -652,8 +580,8 @@ def test_multiple_insert_four_large_lobs_via_writelob_requests(connection, test_
     """
     bigblob1 = os.urandom(2 * constants.MAX_SEGMENT_SIZE + 1000)
     bigblob2 = os.urandom(2 * constants.MAX_SEGMENT_SIZE + 1000)
-    bigclob1 = ''.join(random.choice(string.ascii_letters) for x in iter_range(2 * constants.MAX_SEGMENT_SIZE))
-    bigclob2 = ''.join(random.choice(string.ascii_letters) for x in iter_range(2 * constants.MAX_SEGMENT_SIZE))
+    bigclob1 = ''.join(random.choice(string.ascii_letters) for x in range(2 * constants.MAX_SEGMENT_SIZE))
+    bigclob2 = ''.join(random.choice(string.ascii_letters) for x in range(2 * constants.MAX_SEGMENT_SIZE))
     cursor = connection.cursor()
     cursor.executemany("insert into %s (fblob, name, fclob) values (:1, :2, :3)" % TABLE,
                        [(bigblob1, 'blob1', bigclob1),
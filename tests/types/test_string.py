@@ -21,7 +21,6 @@ import pytest
 ###
 from pyhdb.protocol import types
 from pyhdb.exceptions import InterfaceError
-from pyhdb.compat import byte_type, iter_range
 
 
 # ########################## Test value unpacking #####################################
@@ -57,7 +56,7 @@ def test_unpack_invalid_string_length_indicator():
     (b"\xFF", None),
     (
         b"\x0B\xFF\x00\xFF\x00\xFF\x00\xFF\x00\xFF\x00\xFF",
-        byte_type(b"\xFF\x00\xFF\x00\xFF\x00\xFF\x00\xFF\x00\xFF")
+        b"\xFF\x00\xFF\x00\xFF\x00\xFF\x00\xFF\x00\xFF"
     ),
 ])
 def test_unpack_binary(given, expected):
@@ -78,8 +77,8 @@ def test_unpack_very_long_binary():
 
 
 @pytest.mark.parametrize("given,expected", [
-    (byte_type(b"\xFF\x00\xFF\xA3\x5B"), "'ff00ffa35b'"),
-    (byte_type(b"\x75\x08\x15\xBB\xAA"), "'750815bbaa'"),
+    (b"\xFF\x00\xFF\xA3\x5B", "'ff00ffa35b'"),
+    (b"\x75\x08\x15\xBB\xAA", "'750815bbaa'"),
 ])
 def test_escape_binary(given, expected):
     assert types.Binary.to_sql(given) == expected
@@ -127,7 +126,7 @@ def test_table(request, connection):
 def test_insert_string(connection, test_table):
     """Insert string into table"""
     cursor = connection.cursor()
-    large_string = ''.join(random.choice(string.ascii_letters) for _ in iter_range(5000))
+    large_string = ''.join(random.choice(string.ascii_letters) for _ in range(5000))
     cursor.execute("insert into %s (name) values (:1)" % TABLE, [large_string])
     connection.commit()
     cursor = connection.cursor()